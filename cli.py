@@ -32,12 +32,15 @@ import os
 import sys
 import logging
 import re
-import threading
-import queue
-import tempfile
+import asyncio
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
 import io
 import wave
-from typing import Optional, Dict, Any, cast, List, Tuple, IO
+import stat
+import struct
+from typing import Optional, Dict, Any, cast, List, Tuple, IO, Iterator
 from dotenv import load_dotenv
 
 # Configure logging
@@ -54,126 +57,308 @@ try:
         play_audio,
     )
     from libs.exceptions import TTSException, ValidationError, EngineNotAvailableError
+    from libs.formats import WAV_UNKNOWN_SIZE, wav_header
+    from engines import resolve_engine_name
 except ImportError as e:
     logger.error(f"Failed to import TTS library: {e}")
     sys.exit(1)
 
-SPLIT_REGEX = re.compile(r"(?<=[.!?]|,|\n)")
+# Split after sentence punctuation, comma or newline: a single character
+# class lookbehind instead of an alternation
+SPLIT_REGEX = re.compile(r"(?<=[.!?,\n])")
+
+
+def _iter_parts(text: str) -> Iterator[str]:
+    """Yield stripped non-empty parts of text, stripping each part once."""
+    for p in SPLIT_REGEX.split(text):
+        s = p.strip()
+        if s:
+            yield s
 
 
 def chunk_text(text: str, max_len: int = 5000) -> List[str]:
-    """Split text by sentence-ish boundaries to chunks <= max_len."""
-    parts = [p.strip() for p in SPLIT_REGEX.split(text) if p and p.strip()]
+    """Split text by sentence-ish boundaries to chunks <= max_len.
+
+    Parts are packed greedily: with cum[k] the length of parts[:k] (each
+    counted with its joining space), the chunk starting at part `start`
+    ends at the last prefix that fits, found by bisect instead of growing
+    a buffer part by part.
+
+    Text that already fits in one chunk and has no newlines is returned
+    stripped, without splitting.
+    """
+    if len(text) <= max_len and "\n" not in text:
+        s = text.strip()
+        return [s] if s else []
+    parts = list(_iter_parts(text))
+    cum = [0, *accumulate(len(p) + 1 for p in parts)]
     chunks: List[str] = []
-    buf: List[str] = []
-    cur_len = 0
-    for p in parts:
-        if len(p) > max_len:
-            if cur_len:
-                chunks.append(" ".join(buf))
-                buf, cur_len = [], 0
+    chunks_append = chunks.append
+    join = " ".join
+    n = len(parts)
+    start = 0
+    while start < n:
+        end = bisect_right(cum, cum[start] + max_len + 1, lo=start) - 1
+        if end == start:
+            # Single part longer than max_len: hard split it
+            p = parts[start]
             for i in range(0, len(p), max_len):
-                chunks.append(p[i : i + max_len])
-            continue
-        add_len = (1 if buf else 0) + len(p)
-        if cur_len + add_len <= max_len:
-            buf.append(p)
-            cur_len += add_len
+                chunks_append(p[i : i + max_len])
+            start += 1
         else:
-            if buf:
-                chunks.append(" ".join(buf))
-            buf, cur_len = [p], len(p)
-    if buf:
-        chunks.append(" ".join(buf))
+            chunks_append(join(parts[start:end]))
+            start = end
     return chunks
 
 
-def concat_wav_files(in_paths: List[str], out_stream: IO[bytes]) -> None:
-    """Concat WAV files (with same parametrs) to one WAV file,
-    recordings to out_stream."""
-    if not in_paths:
-        return
-    wout = wave.open(out_stream, "wb")
-    first = True
+class WavStreamWriter:
+    """Write WAV chunks with the same parameters to a stream as one WAV.
+
+    The header is written with the first chunk, with the data size unknown
+    (0xFFFFFFFF, the usual convention for streamed WAV), so a consumer can
+    start playing before the last chunk is synthesized. On close the sizes
+    are patched in if the stream is seekable.
+    """
+
+    def __init__(self, out_stream: IO[bytes]) -> None:
+        self.out = out_stream
+        self.params: Optional[Tuple[int, int, int]] = None
+        self.data_size = 0
+        self.header_pos = 0
+
+    def write(self, wav_bytes: bytes) -> None:
+        """Append the PCM payload of one WAV chunk.
+
+        Only the chunk header is parsed; the payload is written with a
+        single write, without decoding frames.
+
+        Raises:
+            TTSException: If chunk channels/width/rate differ from the first
+        """
+        src = io.BytesIO(wav_bytes)
+        with wave.open(src, "rb") as win:
+            nchannels, sampwidth, framerate = params = win.getparams()[:3]
+            size = win.getnframes() * nchannels * sampwidth
+            # wave stops parsing at the start of the data chunk
+            start = src.tell()
+        if self.params is None:
+            self.params = params
+            self.header_pos = self._tell()
+            self.out.write(
+                wav_header(nchannels, sampwidth, framerate, WAV_UNKNOWN_SIZE)
+            )
+        elif params != self.params:
+            raise TTSException("WAV params mismatch; cannot concatenate.")
+        pcm = memoryview(wav_bytes)[start : start + size]
+        self.out.write(pcm)
+        self.data_size += len(pcm)
+        self.out.flush()
+
+    def close(self) -> None:
+        """Patch RIFF and data sizes when the stream allows seeking."""
+        if self.params is None or not self._seekable():
+            return
+        end = self.out.tell()
+        self.out.seek(self.header_pos + 4)
+        self.out.write(struct.pack("<I", 36 + self.data_size))
+        self.out.seek(self.header_pos + 40)
+        self.out.write(struct.pack("<I", self.data_size))
+        self.out.seek(end)
+        self.out.flush()
+
+    def _seekable(self) -> bool:
+        try:
+            return self.out.seekable()
+        except (AttributeError, ValueError):
+            return False
+
+    def _tell(self) -> int:
+        return self.out.tell() if self._seekable() else 0
+
+
+READ_BUFFER_SIZE = 1 << 20
+
+# Engines whose generate_batch() batches on the device; other engines
+# (e.g. gtts, whose batch is only parallel requests) use the per-chunk
+# window, which starts playback as soon as the first chunk is ready
+DEVICE_BATCH_ENGINES = frozenset({"coquitts"})
+
+# item in queue: Optional[Tuple[int, bytes]] -> (idx, audio_bytes)
+QUEUE_ITEM = Optional[Tuple[int, bytes]]
+
+
+def get_concurrency() -> int:
+    """Number of chunks synthesized in parallel (TTS_CONCURRENCY, default 3)."""
     try:
-        for p in in_paths:
-            win = wave.open(p, "rb")
-            try:
-                if first:
-                    wout.setnchannels(win.getnchannels())
-                    wout.setsampwidth(win.getsampwidth())
-                    wout.setframerate(win.getframerate())
-                    first = False
-                else:
-                    if (
-                        win.getnchannels() != wout.getnchannels()
-                        or win.getsampwidth() != wout.getsampwidth()
-                        or win.getframerate() != wout.getframerate()
-                    ):
-                        logger.warning(
-                            f"WAV params mismatch in {p}; attempting naive append (may be invalid)."
-                        )
-                frames = win.readframes(win.getnframes())
-                wout.writeframes(frames)
-            finally:
-                win.close()
-    finally:
-        wout.close()
+        return max(1, int(os.getenv("TTS_CONCURRENCY", "3")))
+    except ValueError:
+        return 3
 
 
-# item in queue: Optional[Tuple[int, str, bytes]] -> (idx, tmp_path, audio_bytes)
-QUEUE_ITEM = Optional[Tuple[int, str, bytes]]
+def get_readahead() -> int:
+    """Number of chunks synthesized ahead of playback (TTS_READAHEAD, default 4)."""
+    try:
+        return max(1, int(os.getenv("TTS_READAHEAD", "4")))
+    except ValueError:
+        return 4
 
 
-def rec_worker(
+async def rec_worker(
     text_chunks: List[str],
     eng: str,
     lang: str,
-    q: "queue.Queue[QUEUE_ITEM]",
-    tmp_suffix: str,
+    q: "asyncio.Queue[QUEUE_ITEM]",
 ) -> None:
-    """Generating audio`s and packing its in row (idx, tmp_path, bytes)."""
-    from libs.api import text_to_speech_bytes
+    """Generating audio`s concurrently and packing its in row (idx, bytes).
+
+    Chunks are synthesized in worker threads, at most TTS_CONCURRENCY at
+    once (asyncio.Semaphore) and at most TTS_READAHEAD in flight. Engines
+    in DEVICE_BATCH_ENGINES get TTS_READAHEAD chunks per generate_batch()
+    call instead; if a batch fails, its chunks are retried one by one so
+    only the failing chunk is lost.
+    Results are put to the queue strictly in chunk order so play_worker
+    receives items 1, 2, 3, ...
+    """
+    from engines import get_engine_batch_function
+    from libs.api import text_to_speech_bytes, text_to_speech_bytes_batch
 
-    for i, chunk in enumerate(text_chunks, start=1):
+    readahead = get_readahead()
+    sem = asyncio.Semaphore(get_concurrency())
+
+    async def synthesize(chunk: str) -> bytes:
+        async with sem:
+            return await asyncio.to_thread(
+                text_to_speech_bytes, text=chunk, engine=eng, language=lang
+            )
+
+    async def synthesize_or_empty(i: int, chunk: str) -> bytes:
         try:
-            audio_bytes = text_to_speech_bytes(text=chunk, engine=eng, language=lang)
+            return await synthesize(chunk)
         except Exception as e:
             logger.error(f"TTS error on chunk {i}: {e}")
-            audio_bytes = b""
-        fd, tmp_path = tempfile.mkstemp(suffix=tmp_suffix)
-        os.close(fd)
+            return b""
+
+    if (
+        resolve_engine_name(eng) in DEVICE_BATCH_ENGINES
+        and get_engine_batch_function(eng) is not None
+    ):
+        for start in range(0, len(text_chunks), readahead):
+            batch = text_chunks[start : start + readahead]
+            try:
+                results = await asyncio.to_thread(
+                    text_to_speech_bytes_batch, batch, engine=eng, language=lang
+                )
+            except Exception as e:
+                logger.warning(
+                    f"TTS batch error on chunks {start + 1}-{start + len(batch)}, "
+                    f"retrying one by one: {e}"
+                )
+                results = [
+                    await synthesize_or_empty(i, chunk)
+                    for i, chunk in enumerate(batch, start=start + 1)
+                ]
+            for i, audio_bytes in enumerate(results, start=start + 1):
+                await q.put((i, audio_bytes))
+        await q.put(None)  # Signal of end
+        return
+
+    async def emit(i: int, task: "asyncio.Task[bytes]") -> None:
         try:
-            with open(tmp_path, "wb") as f:
-                f.write(audio_bytes)
+            audio_bytes = await task
         except Exception as e:
-            logger.error(f"Failed to write temp audio for chunk {i}: {e}")
-        q.put((i, tmp_path, audio_bytes))
-    q.put(None)  # Signal of end
+            logger.error(f"TTS error on chunk {i}: {e}")
+            audio_bytes = b""
+        await q.put((i, audio_bytes))
+
+    window: "deque[Tuple[int, asyncio.Task[bytes]]]" = deque()
+    for i, chunk in enumerate(text_chunks, start=1):
+        window.append((i, asyncio.create_task(synthesize(chunk))))
+        # Window is full: wait for the oldest chunk before starting more
+        if len(window) >= readahead:
+            await emit(*window.popleft())
+    while window:
+        await emit(*window.popleft())
+    await q.put(None)  # Signal of end
 
 
-def play_worker(
-    q: "queue.Queue[QUEUE_ITEM]",
+async def play_worker(
+    q: "asyncio.Queue[QUEUE_ITEM]",
     modes: List[str],
-    collected_paths: List[str],
+    file_paths: List[str],
+    saved_files: List[str],
     play_func,
+    engine: str = "gtts",
 ) -> None:
     """
     modes: subset ['file','play','stdout']
-    collected_paths: filled with temporary file paths (in order of receipt)
+    file_paths: destination of every chunk (chunk idx is saved to
+        file_paths[idx - 1]) when saving to file
+    saved_files: filled with paths of written files (in order of receipt)
+    engine: used to pick stdout framing - gtts chunks are MP3 and written
+        as is, other engines return WAV and are streamed as one WAV
+
+    Every chunk is saved and written to stdout as soon as it is received,
+    so a consumer gets the first audio before the rest is done and no
+    audio is kept around after the last chunk. Blocking output runs in
+    the default executor so synthesis keeps going during playback.
     """
-    while True:
-        item = q.get()
-        if item is None:
-            break
-        idx, tmp_path, audio_bytes = item
-        collected_paths.append(tmp_path)
+    stdout_wav: Optional[WavStreamWriter] = None
+    if "stdout" in modes and engine != "gtts":
+        stdout_wav = WavStreamWriter(sys.stdout.buffer)
+
+    def deliver(idx: int, audio_bytes: bytes) -> None:
+        if "file" in modes:
+            dst = file_paths[idx - 1]
+            try:
+                with open(dst, "wb") as f:
+                    f.write(audio_bytes)
+                saved_files.append(dst)
+            except OSError as e:
+                logger.error(f"Failed to save chunk {idx} to {dst}: {e}")
+        if "stdout" in modes and audio_bytes:
+            try:
+                if stdout_wav is not None:
+                    stdout_wav.write(audio_bytes)
+                else:
+                    sys.stdout.buffer.write(audio_bytes)
+                    sys.stdout.buffer.flush()
+            except Exception as e:
+                logger.error(f"Stdout error on chunk {idx}: {e}")
         if "play" in modes:
             try:
                 play_func(audio_bytes)
             except Exception as e:
                 logger.error(f"Playback error on chunk {idx}: {e}")
 
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            item = await q.get()
+            if item is None:
+                break
+            await loop.run_in_executor(None, deliver, *item)
+    finally:
+        if stdout_wav is not None:
+            stdout_wav.close()
+
+
+async def run_pipeline(
+    chunks: List[str],
+    engine: str,
+    language: str,
+    modes: List[str],
+    file_paths: List[str],
+    play_func,
+) -> List[str]:
+    """Synthesize chunks and deliver them in order; return saved file paths."""
+    q: "asyncio.Queue[QUEUE_ITEM]" = asyncio.Queue(maxsize=get_readahead())
+    saved_files: List[str] = []
+    await asyncio.gather(
+        rec_worker(chunks, engine, language, q),
+        play_worker(q, modes, file_paths, saved_files, play_func, engine),
+    )
+    return saved_files
+
 
 def get_config() -> Dict[str, Any]:
     """Load configuration from .env file if it exists."""
@@ -198,15 +383,21 @@ def get_config() -> Dict[str, Any]:
 
 
 def read_file(file_path: str) -> str:
-    """Read text content from a file."""
+    """Read text content from a file.
+
+    The file is opened once and checked with fstat on the open descriptor
+    instead of separate exists/isfile lookups.
+    """
     try:
-        file_path = os.path.normpath(file_path)
-        if not os.path.exists(file_path):
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except FileNotFoundError:
             raise ValidationError(f"File not found: {file_path}")
-        if not os.path.isfile(file_path):
+        if not stat.S_ISREG(os.fstat(fd).st_mode):
+            os.close(fd)
             raise ValidationError(f"Path is not a file: {file_path}")
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read().strip()
+        with open(fd, "rb", buffering=READ_BUFFER_SIZE) as f:
+            content = f.read().decode("utf-8").strip()
         if not content:
             raise ValidationError(f"File is empty: {file_path}")
         return content
@@ -242,6 +433,10 @@ Environment Configuration:
   DEFAULT_OUTPUT_FORMAT=file
   AUDIO_DIRECTORY=audio
   AUTO_PLAY=false
+  TTS_CONCURRENCY=3          # Chunks synthesized in parallel
+  TTS_READAHEAD=4            # Chunks synthesized ahead of playback
+  TTS_CHUNK_TMPDIR=/dev/shm  # Scratch dir for MP3 playback / pyttsx3 output
+                             (default: /dev/shm if present, else system temp)
         """,
     )
 
@@ -344,7 +539,7 @@ def to_file(
         audio_dir = args.audio_dir or config["audio_directory"]
         from libs.tools import ensure_audio_directory
         ensure_audio_directory(audio_dir)
-        from libs.api import generate_timestamp_filename
+        from libs.tools import generate_timestamp_filename
         timestamp_filename = cast(str, generate_timestamp_filename("", extension))
         return os.path.join(audio_dir, timestamp_filename)
     if args.file.endswith("/") or (
@@ -352,7 +547,7 @@ def to_file(
     ):
         from libs.tools import ensure_audio_directory
         ensure_audio_directory(args.file)
-        from libs.api import generate_timestamp_filename
+        from libs.tools import generate_timestamp_filename
         timestamp_filename = cast(str, generate_timestamp_filename("", extension))
         return os.path.join(args.file, timestamp_filename)
     parent_dir = os.path.dirname(args.file)
@@ -371,7 +566,7 @@ def main() -> int:
         setup_logging(args.verbose, args.quiet)
         config = get_config()
         text = get_text(args)
-        engine = args.engine or config["engine"]
+        engine = resolve_engine_name(args.engine or config["engine"])
         language = args.language or config["language"]
 
         # Determine output formats
@@ -404,7 +599,7 @@ def main() -> int:
                 audio_dir = config["audio_directory"]
                 from libs.tools import ensure_audio_directory
                 ensure_audio_directory(audio_dir)
-                from libs.api import generate_timestamp_filename
+                from libs.tools import generate_timestamp_filename
                 prefix = config.get("filename_prefix", "")
                 extension = "wav" if engine in ["pyttsx3", "pipertts"] else "mp3"
                 timestamp_filename = generate_timestamp_filename(prefix, extension)
@@ -457,93 +652,56 @@ def main() -> int:
             print(f"Chunks: {len(chunks)} (<= {MAX_LEN} chars each)", file=sys.stderr)
 
         ext = "mp3" if engine == "gtts" else "wav"
-        tmp_suffix = f".{ext}"
 
         out_is_stdout = "stdout" in output_formats
         out_is_file = "file" in output_formats
 
-        q: "queue.Queue[QUEUE_ITEM]" = queue.Queue(maxsize=2)
-        collected_paths: List[str] = []
-
-        rec = threading.Thread(
-            target=rec_worker,
-            args=(chunks, engine, language, q, tmp_suffix),
-            daemon=True,
-        )
-        play = threading.Thread(
-            target=play_worker,
-            args=(q, output_formats, collected_paths, play_audio),
-            daemon=True,
-        )
-        rec.start()
-        play.start()
-        rec.join()
-        play.join()
-
-        saved_files: List[str] = []
+        if out_is_stdout and engine == "gtts" and len(chunks) > 1:
+            # MP3 - don't glue them together without recoding -
+            # chunks are written sequentially
+            print(
+                """WARNING: multiple MP3 chunks written sequentially
+                to stdout; this is not a single valid MP3 file.""",
+                file=sys.stderr,
+            )
 
+        file_paths: List[str] = []
         if out_is_file:
             if output_filename and not os.path.isdir(output_filename):
                 base, ext2 = os.path.splitext(output_filename)
                 if not ext2:
                     ext2 = f".{ext}"
-                for i, p in enumerate(collected_paths, start=1):
-                    dst = f"{base}_{i:03d}{ext2}"
-                    os.replace(p, dst)
-                    saved_files.append(dst)
+                file_paths = [
+                    f"{base}_{i:03d}{ext2}" for i in range(1, len(chunks) + 1)
+                ]
             else:
                 out_dir = (
                     output_filename
                     if (output_filename and os.path.isdir(output_filename))
                     else (args.audio_dir or config["audio_directory"])
                 )
-                from libs.tools import ensure_audio_directory
+                from libs.tools import ensure_audio_directory, generate_timestamp_filename
                 ensure_audio_directory(out_dir)
-                for i, p in enumerate(collected_paths, start=1):
-                    from libs.api import generate_timestamp_filename
-                    fname = generate_timestamp_filename(f"part_{i:03d}_", ext)
-                    dst = os.path.join(out_dir, fname)
-                    os.replace(p, dst)
-                    saved_files.append(dst)
+                file_paths = [
+                    os.path.join(
+                        out_dir, generate_timestamp_filename(f"part_{i:03d}_", ext)
+                    )
+                    for i in range(1, len(chunks) + 1)
+                ]
 
+        saved_files = asyncio.run(
+            run_pipeline(
+                chunks, engine, language, output_formats, file_paths, play_audio
+            )
+        )
+
+        if out_is_file:
             if "stdout" not in output_formats:
                 for fpath in saved_files:
                     print(fpath, file=sys.stdout)
             else:
                 for fpath in saved_files:
                     print(fpath, file=sys.stderr)
-        else:
-            pass
-
-        # STDOUT
-        if out_is_stdout:
-            if engine == "gtts":
-                # MP3 - don't glue them together without recoding -
-                # write them sequentially
-                print(
-                    """WARNING: multiple MP3 chunks written sequentially
-                    to stdout; this is not a single valid MP3 file.""",
-                    file=sys.stderr,
-                )
-                src_list = saved_files if saved_files else collected_paths
-                for p in src_list:
-                    with open(p, "rb") as f:
-                        sys.stdout.buffer.write(f.read())
-                sys.stdout.buffer.flush()
-            else:
-                src_list = saved_files if saved_files else collected_paths
-                stdout_buf = io.BytesIO()
-                concat_wav_files(src_list, stdout_buf)
-                sys.stdout.buffer.write(stdout_buf.getvalue())
-                sys.stdout.buffer.flush()
-
-        if not out_is_file:
-            for p in collected_paths:
-                try:
-                    if os.path.exists(p):
-                        os.unlink(p)
-                except Exception:
-                    pass
 
         return 0
 
@@ -8,19 +8,64 @@ Engine Interface:
     Each engine module must implement:
     - is_available() -> bool
     - generate(text: str, config: dict) -> bytes
+
+    Optionally it can implement:
+    - generate_batch(texts: List[str], config: dict) -> List[bytes]
+    - generate_stream(text: str, config: dict) -> Iterator[Tuple[bytes, int]]
+    - preload(config: dict) -> None
 """
 
 import importlib
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Callable, Dict
+from typing import Optional, Callable, Dict, Iterator, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Type definitions
 EngineFunction = Callable[[str, dict], bytes]
+BatchEngineFunction = Callable[[List[str], dict], List[bytes]]
+StreamEngineFunction = Callable[[str, dict], Iterator[Tuple[bytes, int]]]
+PreloadFunction = Callable[[dict], None]
+
+# Short names accepted in place of engine module names
+ENGINE_ALIASES: Dict[str, str] = {
+    "piper": "pipertts",
+    "silero": "silerotts",
+    "coqui": "coquitts",
+}
+
+# Results of load_engine(), keyed by engine name (None if unavailable)
+_LOAD_CACHE: Dict[str, Optional[object]] = {}
+_LOAD_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def load_env() -> None:
+    """
+    Load the project .env file into the environment, once per process.
+
+    Engines call this at import to read their settings; python-dotenv is
+    optional and only imported here.
+    """
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return  # dotenv not installed, skip
+
+    env_file = Path(__file__).parent.parent / ".env"
+    if env_file.exists():
+        load_dotenv(env_file)
+
 
+def resolve_engine_name(engine_name: str) -> str:
+    """Map an engine alias (e.g. 'piper') to its module name."""
+    return ENGINE_ALIASES.get(engine_name, engine_name)
 
+
+@lru_cache(maxsize=None)
 def get_engine_module_path(engine_name: str) -> Optional[Path]:
     """
     Check if engine module file exists.
@@ -32,7 +77,7 @@ def get_engine_module_path(engine_name: str) -> Optional[Path]:
         Path to the module file if exists, None otherwise
     """
     engines_dir = Path(__file__).parent
-    module_path = engines_dir / f"{engine_name}.py"
+    module_path = engines_dir / f"{resolve_engine_name(engine_name)}.py"
 
     if module_path.exists():
         return module_path
@@ -44,12 +89,24 @@ def load_engine(engine_name: str) -> Optional[object]:
     """
     Dynamically load an engine module.
 
+    The result is cached per engine name, so the import and the
+    is_available() probe run once per process.
+
     Args:
         engine_name: Name of the engine
 
     Returns:
         Loaded module object or None if unavailable
     """
+    with _LOAD_LOCK:
+        if engine_name in _LOAD_CACHE:
+            return _LOAD_CACHE[engine_name]
+        module = _load_engine_uncached(engine_name)
+        _LOAD_CACHE[engine_name] = module
+        return module
+
+
+def _load_engine_uncached(engine_name: str) -> Optional[object]:
     # Check if module file exists
     if not get_engine_module_path(engine_name):
         logger.warning(f"Engine module not found: {engine_name}.py")
@@ -57,7 +114,9 @@ def load_engine(engine_name: str) -> Optional[object]:
 
     try:
         # Try to import the engine module
-        module = importlib.import_module(f".{engine_name}", package="engines")
+        module = importlib.import_module(
+            f".{resolve_engine_name(engine_name)}", package="engines"
+        )
 
         # Check if it's available (dependencies installed)
         if hasattr(module, "is_available") and module.is_available():
@@ -132,3 +191,60 @@ def get_engine_function(engine_name: str) -> Optional[EngineFunction]:
         return generate_func
 
     return None
+
+
+def get_engine_batch_function(engine_name: str) -> Optional[BatchEngineFunction]:
+    """
+    Get the generate_batch function for an engine.
+
+    Args:
+        engine_name: Name of the engine
+
+    Returns:
+        Batch generate function or None if the engine has no batch support
+    """
+    module = load_engine(engine_name)
+
+    if module and hasattr(module, "generate_batch"):
+        batch_func: BatchEngineFunction = module.generate_batch
+        return batch_func
+
+    return None
+
+
+def get_engine_stream_function(engine_name: str) -> Optional[StreamEngineFunction]:
+    """
+    Get the generate_stream function for an engine.
+
+    Args:
+        engine_name: Name of the engine
+
+    Returns:
+        Stream generate function or None if the engine has no stream support
+    """
+    module = load_engine(engine_name)
+
+    if module and hasattr(module, "generate_stream"):
+        stream_func: StreamEngineFunction = module.generate_stream
+        return stream_func
+
+    return None
+
+
+def get_engine_preload_function(engine_name: str) -> Optional[PreloadFunction]:
+    """
+    Get the preload function for an engine.
+
+    Args:
+        engine_name: Name of the engine
+
+    Returns:
+        Preload function or None if the engine has nothing to preload
+    """
+    module = load_engine(engine_name)
+
+    if module and hasattr(module, "preload"):
+        preload_func: PreloadFunction = module.preload
+        return preload_func
+
+    return None
@@ -9,33 +9,21 @@ IMPORTANT: Requires Python 3.9-3.11 (NOT compatible with Python 3.12+)
 Note: Works best with GPU. CPU mode is very slow.
 """
 
+import contextlib
+import importlib.util
+import io
 import tempfile
 import os
 import logging
-import torch
-from torch.serialization import add_safe_globals, safe_globals
-from TTS.tts.configs.xtts_config import XttsConfig
-from TTS.tts.models.xtts import XttsAudioConfig, XttsArgs
-from TTS.config.shared_configs import BaseDatasetConfig
+import threading
+import wave
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+from engines import load_env
 from libs.exceptions import EngineNotAvailableError, TTSException
 
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-
-    # Get project root and load .env
-except ImportError:
-
-    def load_dotenv(*args, **kwargs):
-        pass
-
-
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-env_file = os.path.join(project_root, ".env")
-if os.path.exists(env_file):
-    load_dotenv(env_file)
-else:
-    load_dotenv()
+load_env()
 
 logger = logging.getLogger(__name__)
 
@@ -44,16 +32,26 @@ COQUITTS_MODEL = os.getenv(
     "COQUITTS_MODEL", "tts_models/multilingual/multi-dataset/xtts_v2"
 )
 COQUITTS_SAMPLE = os.getenv("COQUITTS_SAMPLE", "samples/1.wav")
+# Run CUDA inference under float16/bfloat16 autocast
+COQUITTS_FP16 = os.getenv("COQUITTS_FP16", "1") == "1"
+# Generate through a temporary WAV file instead of in memory
+COQUITTS_USE_TMPFILE = os.getenv("COQUITTS_USE_TMPFILE", "0") == "1"
 
-# Try to import Coqui TTS
-try:
+# Check for Coqui TTS without importing it: torch and TTS take seconds to
+# import, they are imported on first generation instead
+if TYPE_CHECKING:
     from TTS.api import TTS
 
-    AVAILABLE = True
-except ImportError:
-    AVAILABLE = False
+AVAILABLE = importlib.util.find_spec("TTS") is not None
+if not AVAILABLE:
     logger.warning("Coqui TTS not available. Install with: pip install TTS")
 
+# Loaded models, keyed by (model_name, device)
+_MODEL_CACHE: Dict[Tuple[str, str], "TTS"] = {}
+_MODEL_LOCK = threading.Lock()
+# Coqui models are not safe to run from several threads at once
+_INFERENCE_LOCK = threading.Lock()
+
 
 def is_available() -> bool:
     """Check if Coqui TTS is available."""
@@ -69,6 +67,136 @@ def get_models_directory() -> str:
     return os.path.abspath(os.path.expanduser("~/.local/share/tts"))
 
 
+@lru_cache(maxsize=None)
+def _xtts_safe_globals() -> list:
+    """Import the config classes XTTS checkpoints pickle and allow them in
+    torch.load (registered once per process)."""
+    from torch.serialization import add_safe_globals
+    from TTS.tts.configs.xtts_config import XttsConfig
+    from TTS.tts.models.xtts import XttsAudioConfig, XttsArgs
+    from TTS.config.shared_configs import BaseDatasetConfig
+
+    safe = [XttsConfig, XttsAudioConfig, BaseDatasetConfig, XttsArgs]
+    try:
+        add_safe_globals(safe)
+    except Exception:
+        pass
+    return safe
+
+
+def get_model(model_name: str, device: str) -> "TTS":
+    """
+    Get a loaded TTS model, loading it on first use.
+
+    The model is cached per (model_name, device), so chunked runs load the
+    checkpoint once instead of once per chunk.
+    """
+    from torch.serialization import safe_globals
+    from TTS.api import TTS
+
+    key = (model_name, device)
+    with _MODEL_LOCK:
+        tts = _MODEL_CACHE.get(key)
+        if tts is None:
+            # This will download model on first use
+            with safe_globals(_xtts_safe_globals()):
+                tts = TTS(model_name=model_name, progress_bar=False).to(device)
+            _MODEL_CACHE[key] = tts
+        return tts
+
+
+def _check_available() -> None:
+    """Raise if Coqui TTS or the speaker sample is missing."""
+    if not is_available():
+        raise EngineNotAvailableError(
+            "Coqui TTS not available. Install with: pip install TTS\n"
+            "See docs/COQUITTS.md for setup instructions."
+        )
+    if not os.path.exists(COQUITTS_SAMPLE):
+        raise TTSException(f"Sample WAV not found: {COQUITTS_SAMPLE}")
+
+
+def _get_device() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+@contextlib.contextmanager
+def _inference_context(device: str) -> Iterator[None]:
+    """
+    Disable autograd and, on CUDA, run under half precision autocast.
+
+    bfloat16 is used on GPUs that support it (Ampere+), float16 otherwise.
+    Set COQUITTS_FP16=0 to keep full precision.
+    """
+    import torch
+
+    with torch.inference_mode():
+        if device == "cuda" and COQUITTS_FP16:
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            with torch.autocast(device_type="cuda", dtype=dtype):
+                yield
+        else:
+            yield
+
+
+def _load_model() -> "TTS":
+    """Point Coqui at the models directory and get the cached model."""
+    # Set custom models directory if configured
+    models_dir = get_models_directory()
+    # Coqui TTS uses TTS_HOME for model cache
+    os.environ["TTS_HOME"] = models_dir
+    os.environ["XDG_DATA_HOME"] = models_dir
+    logger.info(f"Coqui TTS models directory: {models_dir}")
+    # Initialize TTS
+    return get_model(COQUITTS_MODEL, _get_device())
+
+
+def _generation_error(e: Exception) -> TTSException:
+    if "model" in str(e).lower() and "not found" in str(e).lower():
+        return TTSException(f"Coqui TTS model not found.\n" f"Error: {e}")
+    return TTSException(f"Coqui TTS generation failed: {e}")
+
+
+def _wav_to_bytes(wav: list, sample_rate: int) -> bytes:
+    """Encode a float waveform in [-1, 1] as 16-bit mono WAV bytes."""
+    import torch
+
+    pcm = torch.as_tensor(wav, dtype=torch.float32).clamp(-1, 1).mul(32767)
+    audio_buffer = io.BytesIO()
+    with wave.open(audio_buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.to(torch.int16).numpy().tobytes())
+    return audio_buffer.getvalue()
+
+
+def _generate_via_file(tts: "TTS", text: str, kwargs: dict) -> bytes:
+    """Generate through a temporary WAV file (COQUITTS_USE_TMPFILE=1)."""
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+        temp_filename = temp_file.name
+    try:
+        with _INFERENCE_LOCK, _inference_context(_get_device()):
+            tts.tts_to_file(text=text, file_path=temp_filename, **kwargs)
+        # Read and return bytes
+        if not os.path.exists(temp_filename) or os.path.getsize(temp_filename) == 0:
+            raise TTSException("Coqui TTS failed to generate audio")
+        with open(temp_filename, "rb") as f:
+            return f.read()
+    finally:
+        if os.path.exists(temp_filename):
+            os.unlink(temp_filename)
+
+
+def _synthesis_kwargs(language: str) -> dict:
+    # For multilingual models, specify language and speaker sample
+    if "multilingual" in COQUITTS_MODEL:
+        return {"language": language, "speaker_wav": COQUITTS_SAMPLE}
+    return {}
+
+
 def generate(text: str, config: dict) -> bytes:
     """
     Generate TTS and return audio as bytes.
@@ -83,57 +211,53 @@ def generate(text: str, config: dict) -> bytes:
     Note:
         First run will download the model (can be slow).
         Generation is slow on CPU, fast on GPU.
+        The waveform is encoded in memory; set COQUITTS_USE_TMPFILE=1 for
+        models whose Python API only supports file output.
     """
-    if not is_available():
-        raise EngineNotAvailableError(
-            "Coqui TTS not available. Install with: pip install TTS\n"
-            "See docs/COQUITTS.md for setup instructions."
-        )
-    if not os.path.exists(COQUITTS_SAMPLE):
-        raise TTSException(f"Sample WAV not found: {COQUITTS_SAMPLE}")
+    _check_available()
+    try:
+        language = config.get("language", "en")
+        tts = _load_model()
+        kwargs = _synthesis_kwargs(language)
+        if COQUITTS_USE_TMPFILE:
+            return _generate_via_file(tts, text, kwargs)
+        with _INFERENCE_LOCK, _inference_context(_get_device()):
+            wav = tts.tts(text=text, **kwargs)
+        if wav is None or len(wav) == 0:
+            raise TTSException("Coqui TTS failed to generate audio")
+        return _wav_to_bytes(wav, tts.synthesizer.output_sample_rate)
+    except Exception as e:
+        raise _generation_error(e)
+
+
+def generate_batch(texts: List[str], config: dict) -> List[bytes]:
+    """
+    Generate TTS for several texts with one model load.
+
+    Args:
+        texts: Texts to synthesize
+        config: Configuration dict with language
+
+    Returns:
+        List of audio bytes in WAV format, in the order of texts
+
+    Note:
+        XTTS has no batched forward pass, so texts are synthesized one
+        after another on the shared model.
+    """
+    _check_available()
     try:
         language = config.get("language", "en")
-        model_name = COQUITTS_MODEL
-        # Set custom models directory if configured
-        models_dir = get_models_directory()
-        # Coqui TTS uses TTS_HOME for model cache
-        os.environ["TTS_HOME"] = models_dir
-        os.environ["XDG_DATA_HOME"] = models_dir
-        logger.info(f"Coqui TTS models directory: {models_dir}")
-        try:
-            add_safe_globals([XttsConfig, XttsAudioConfig, BaseDatasetConfig, XttsArgs])
-        except Exception:
-            pass
-        # Initialize TTS
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        # This will download model on first use
-        with safe_globals([XttsConfig, XttsAudioConfig, BaseDatasetConfig, XttsArgs]):
-            tts = TTS(model_name=model_name, progress_bar=False).to(device)
-        # Generate to temporary file (Coqui TTS requires file output)
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_filename = temp_file.name
-        try:
-            # Generate audio
-            # For multilingual models, specify language
-            if "multilingual" in model_name:
-                # tts.tts_to_file(text=text, file_path=temp_filename, language=language)
-                tts.tts_to_file(
-                    text=text,
-                    file_path=temp_filename,
-                    language=language,
-                    speaker_wav=COQUITTS_SAMPLE,
-                )
-            else:
-                tts.tts_to_file(text=text, file_path=temp_filename)
-            # Read and return bytes
-            if not os.path.exists(temp_filename) or os.path.getsize(temp_filename) == 0:
-                raise TTSException("Coqui TTS failed to generate audio")
-            with open(temp_filename, "rb") as f:
-                return f.read()
-        finally:
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
+        tts = _load_model()
+        sample_rate = tts.synthesizer.output_sample_rate
+        kwargs = _synthesis_kwargs(language)
+        results = []
+        with _INFERENCE_LOCK, _inference_context(_get_device()):
+            for text in texts:
+                wav = tts.tts(text=text, **kwargs)
+                if wav is None or len(wav) == 0:
+                    raise TTSException("Coqui TTS failed to generate audio")
+                results.append(_wav_to_bytes(wav, sample_rate))
+        return results
     except Exception as e:
-        if "model" in str(e).lower() and "not found" in str(e).lower():
-            raise TTSException(f"Coqui TTS model not found.\n" f"Error: {e}")
-        raise TTSException(f"Coqui TTS generation failed: {e}")
\ No newline at end of file
+        raise _generation_error(e)
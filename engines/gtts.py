@@ -5,14 +5,25 @@ Online text-to-speech using Google Text-to-Speech.
 """
 
 from libs.exceptions import EngineNotAvailableError, TTSException
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 import io
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
+# Retries of a request rejected with 429 (Too Many Requests)
+GTTS_RETRIES = 3
+# Delay before the first retry, doubled on each next one (seconds)
+GTTS_BACKOFF = 0.5
+# Reuse pooled keep-alive connections across requests
+GTTS_KEEPALIVE = os.getenv("GTTS_KEEPALIVE", "1") == "1"
+
 # Try to import gTTS
 try:
-    from gtts import gTTS  # type: ignore
+    from gtts import gTTS, gTTSError  # type: ignore
 
     AVAILABLE = True
 except ImportError:
@@ -20,15 +31,63 @@ except ImportError:
     logger.warning("gTTS not available. Install with: pip install gtts")
 
 
+class _SharedSession:
+    """Context manager that hands out the pooled session without closing it."""
+
+    def __enter__(self):
+        return _SESSION
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _PooledRequests:
+    """
+    Stand-in for the requests module inside gtts.tts.
+
+    gTTS opens a new requests.Session (a new TCP+TLS connection) for every
+    request; this Session() returns the shared pooled one instead.
+    Everything else is delegated to requests.
+    """
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+    @staticmethod
+    def Session() -> _SharedSession:
+        return _SharedSession()
+
+
+if AVAILABLE and GTTS_KEEPALIVE:
+    import gtts.tts
+    import requests
+
+    _SESSION = requests.Session()
+    _SESSION.mount(
+        "https://",
+        requests.adapters.HTTPAdapter(
+            pool_connections=8, pool_maxsize=16, max_retries=3
+        ),
+    )
+    gtts.tts.requests = _PooledRequests()
+
+
 def is_available() -> bool:
     """Check if gTTS is available."""
     return AVAILABLE
 
 
+def _is_rate_limited(e: Exception) -> bool:
+    rsp = getattr(e, "rsp", None)
+    return rsp is not None and rsp.status_code == 429
+
+
 def generate(text: str, config: dict) -> bytes:
     """
     Generate TTS and return audio as bytes.
 
+    Requests rejected with 429 are retried with exponential backoff.
+
     Args:
         text: Text to synthesize
         config: Configuration dict with language, slow
@@ -39,16 +98,58 @@ def generate(text: str, config: dict) -> bytes:
     if not AVAILABLE:
         raise EngineNotAvailableError("gTTS not available")
 
+    language = config.get("language", "en")
+    slow = config.get("slow", False)
+
+    for attempt in range(GTTS_RETRIES + 1):
+        try:
+            tts = gTTS(text=text, lang=language, slow=slow)
+            audio_buffer = io.BytesIO()
+            tts.write_to_fp(audio_buffer)
+            audio_buffer.seek(0)
+
+            return audio_buffer.getvalue()
+
+        except gTTSError as e:
+            if attempt < GTTS_RETRIES and _is_rate_limited(e):
+                delay = GTTS_BACKOFF * 2**attempt
+                logger.warning(f"gTTS rate limited, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            raise TTSException(f"gTTS generation failed: {e}")
+        except Exception as e:
+            raise TTSException(f"gTTS generation failed: {e}")
+
+    raise TTSException("gTTS generation failed: too many retries")
+
+
+def get_parallel() -> int:
+    """Number of parallel requests for generate_batch (GTTS_PARALLEL, default 4)."""
     try:
-        language = config.get("language", "en")
-        slow = config.get("slow", False)
+        return max(1, int(os.getenv("GTTS_PARALLEL", "4")))
+    except ValueError:
+        logger.warning("Invalid GTTS_PARALLEL value, using 4")
+        return 4
 
-        tts = gTTS(text=text, lang=language, slow=slow)
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
 
-        return audio_buffer.getvalue()
+def generate_batch(texts: List[str], config: dict) -> List[bytes]:
+    """
+    Generate TTS for several texts with parallel requests.
+
+    Args:
+        texts: Texts to synthesize
+        config: Configuration dict with language, slow
+
+    Returns:
+        List of audio bytes in MP3 format, in the order of texts
+
+    Note:
+        Number of parallel requests is set by GTTS_PARALLEL (default 4).
+    """
+    if not AVAILABLE:
+        raise EngineNotAvailableError("gTTS not available")
 
-    except Exception as e:
-        raise TTSException(f"gTTS generation failed: {e}")
\ No newline at end of file
+    workers = get_parallel()
+    with ThreadPoolExecutor(max_workers=min(workers, len(texts) or 1)) as ex:
+        futures = [ex.submit(generate, text, config) for text in texts]
+        return [f.result() for f in futures]
\ No newline at end of file
@@ -5,41 +5,67 @@ High-quality offline text-to-speech using Piper.
 Fast, natural-sounding voices with support for 50+ languages.
 """
 
+from engines import load_env
 from libs.exceptions import EngineNotAvailableError, TTSException
-import io
-import wave
+from libs.formats import wav_header
+import json
 import logging
 import os
+import threading
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
 
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-
-    # Get project root and load .env
-    _project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    _env_file = os.path.join(_project_root, ".env")
-    if os.path.exists(_env_file):
-        load_dotenv(_env_file)
-except ImportError:
-    pass  # dotenv not installed, skip
+load_env()
 
 logger = logging.getLogger(__name__)
 
+
+def _get_threads() -> int:
+    """PIPER_THREADS, or all CPU cores when unset, 0 or invalid."""
+    try:
+        threads = int(os.getenv("PIPER_THREADS", "0"))
+    except ValueError:
+        logger.warning("Invalid PIPER_THREADS value, using all CPU cores")
+        threads = 0
+    return threads if threads > 0 else os.cpu_count() or 1
+
+
+# onnxruntime intra-op threads per voice (default: all CPU cores)
+PIPER_THREADS = _get_threads()
+# Execution device: auto, cpu, cuda or tensorrt
+PIPER_DEVICE = os.getenv("PIPER_DEVICE", "auto").lower()
+# Built TensorRT engines are cached here, the first build takes minutes
+PIPER_TRT_CACHE = os.getenv(
+    "PIPER_TRT_CACHE",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ".piper",
+        "trt_cache",
+    ),
+)
+
 # Try to import Piper
 try:
-    from piper import PiperVoice  # type: ignore
+    import onnxruntime  # type: ignore
+    from piper import PiperConfig, PiperVoice  # type: ignore
 
     AVAILABLE = True
 except ImportError:
     AVAILABLE = False
     logger.warning("Piper TTS not available. Install with: pip install piper-tts")
 
+# Loaded voices, keyed by model path
+_VOICE_CACHE: Dict[str, "PiperVoice"] = {}
+_VOICE_LOCK = threading.Lock()
+
 
 def is_available() -> bool:
     """Check if Piper TTS is available."""
     return AVAILABLE
 
 
+@lru_cache(maxsize=None)
 def get_models_directory() -> str:
     """
     Get the directory for storing Piper TTS models.
@@ -51,6 +77,10 @@ def get_models_directory() -> str:
 
     Returns:
         Path to models directory
+
+    Note:
+        The result is cached; call get_models_directory.cache_clear()
+        after changing the environment at runtime.
     """
     # Get project root (parent of engines/ directory)
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -73,8 +103,14 @@ def get_models_directory() -> str:
     return os.path.join(project_root, ".piper", "voices")
 
 
+@lru_cache(maxsize=16)
 def get_voice_path(language: str = "en") -> str:
-    """Get path to voice model for specified language."""
+    """
+    Get path to voice model for specified language.
+
+    The result is cached per language; call get_voice_path.cache_clear()
+    after moving models at runtime.
+    """
     voice_models = {
         "en": "en_US-lessac-medium",
         "ru": "ru_RU-ruslan-medium",
@@ -116,6 +152,91 @@ def get_voice_path(language: str = "en") -> str:
     return os.path.join(models_dir, f"{voice_name}.onnx")
 
 
+def _session_options() -> "onnxruntime.SessionOptions":
+    """
+    onnxruntime session options for Piper voices.
+
+    The default options leave the Python wrapper at about half the cores;
+    PIPER_THREADS sets the intra-op thread count (default: all cores).
+    """
+    opts = onnxruntime.SessionOptions()
+    opts.intra_op_num_threads = PIPER_THREADS
+    opts.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    opts.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return opts
+
+
+def _providers() -> list:
+    """
+    Execution providers for PIPER_DEVICE, best first, CPU always last.
+
+    auto picks CUDA when onnxruntime was built with it. TensorRT is only
+    used with PIPER_DEVICE=tensorrt: its first engine build takes minutes
+    and runs in fp16.
+    """
+    device_providers: Dict[str, List[str]] = {
+        "auto": ["CUDAExecutionProvider"],
+        "cpu": [],
+        "cuda": ["CUDAExecutionProvider"],
+        "tensorrt": ["TensorrtExecutionProvider", "CUDAExecutionProvider"],
+    }
+    wanted = device_providers.get(PIPER_DEVICE)
+    if wanted is None:
+        logger.warning(f"Unknown PIPER_DEVICE={PIPER_DEVICE}, using auto")
+        wanted = device_providers["auto"]
+    options = {
+        "TensorrtExecutionProvider": {
+            "trt_engine_cache_enable": True,
+            "trt_engine_cache_path": PIPER_TRT_CACHE,
+            "trt_fp16_enable": True,
+        },
+        "CUDAExecutionProvider": {"cudnn_conv_algo_search": "HEURISTIC"},
+    }
+    available = onnxruntime.get_available_providers()
+    providers: list = [(name, options[name]) for name in wanted if name in available]
+    if not providers and PIPER_DEVICE in ("cuda", "tensorrt"):
+        logger.warning(f"PIPER_DEVICE={PIPER_DEVICE} not supported by onnxruntime, using CPU")
+    providers.append("CPUExecutionProvider")
+    return providers
+
+
+def _load_voice(voice_path: str) -> "PiperVoice":
+    """Build a PiperVoice around an InferenceSession with tuned options."""
+    with open(f"{voice_path}.json", "r", encoding="utf-8") as config_file:
+        config_dict = json.load(config_file)
+    providers = _providers()
+    try:
+        session = onnxruntime.InferenceSession(
+            voice_path, sess_options=_session_options(), providers=providers
+        )
+    except Exception as e:
+        if len(providers) == 1:
+            raise
+        # GPU provider failed to initialize (drivers, TensorRT build)
+        logger.warning(f"Piper GPU session failed, using CPU: {e}")
+        session = onnxruntime.InferenceSession(
+            voice_path,
+            sess_options=_session_options(),
+            providers=["CPUExecutionProvider"],
+        )
+    return PiperVoice(config=PiperConfig.from_dict(config_dict), session=session)
+
+
+def get_voice(voice_path: str) -> "PiperVoice":
+    """
+    Get a loaded voice, loading it on first use.
+
+    The voice is cached per model path, so the ONNX session is created
+    once instead of on every generate() call.
+    """
+    with _VOICE_LOCK:
+        voice = _VOICE_CACHE.get(voice_path)
+        if voice is None:
+            voice = _load_voice(voice_path)
+            _VOICE_CACHE[voice_path] = voice
+        return voice
+
+
 def get_download_instructions(language: str) -> str:
     """Generate download instructions for voice model."""
     voice_models = {
@@ -171,19 +292,63 @@ def generate(text: str, config: dict) -> bytes:
         voice_path = get_voice_path(language)
         logger.info(voice_path)
 
-        # Load voice model
-        voice = PiperVoice.load(voice_path)
+        # Load voice model (cached after the first call)
+        voice = get_voice(voice_path)
 
-        # Generate audio to BytesIO
-        audio_buffer = io.BytesIO()
-        with wave.open(audio_buffer, "wb") as wav_file:
-            voice.synthesize_wav(text, wav_file)
+        # Join the 16-bit PCM of every sentence behind one WAV header
+        pcm = b"".join(chunk.audio_int16_bytes for chunk in voice.synthesize(text))
+        return wav_header(1, 2, voice.config.sample_rate, len(pcm)) + pcm
 
-        audio_buffer.seek(0)
-        return audio_buffer.getvalue()
+    except FileNotFoundError as e:
+        instructions = get_download_instructions(language)
+        raise TTSException(f"{instructions}\n\nError: {e}")
+    except Exception as e:
+        raise TTSException(f"Piper TTS generation failed: {e}")
+
+
+def generate_stream(text: str, config: dict) -> Iterator[Tuple[bytes, int]]:
+    """
+    Generate TTS sentence by sentence.
+
+    Args:
+        text: Text to synthesize
+        config: Configuration dict with language
 
+    Yields:
+        (pcm, sample_rate) per sentence - 16-bit mono PCM samples
+    """
+    if not AVAILABLE:
+        raise EngineNotAvailableError(
+            "Piper TTS not available. Install with: pip install piper-tts\n"
+            "See docs/PIPER.md for setup instructions."
+        )
+    language = config.get("language", "en")
+    try:
+        voice = get_voice(get_voice_path(language))
+        for audio_chunk in voice.synthesize(text):
+            yield audio_chunk.audio_int16_bytes, audio_chunk.sample_rate
     except FileNotFoundError as e:
         instructions = get_download_instructions(language)
         raise TTSException(f"{instructions}\n\nError: {e}")
     except Exception as e:
-        raise TTSException(f"Piper TTS generation failed: {e}")
\ No newline at end of file
+        raise TTSException(f"Piper TTS generation failed: {e}")
+
+
+def preload(config: dict) -> None:
+    """
+    Load the voice for config language ahead of the first generate() call.
+
+    Args:
+        config: Configuration dict with language
+    """
+    if not AVAILABLE:
+        raise EngineNotAvailableError(
+            "Piper TTS not available. Install with: pip install piper-tts\n"
+            "See docs/PIPER.md for setup instructions."
+        )
+    language = config.get("language", "en")
+    try:
+        get_voice(get_voice_path(language))
+    except FileNotFoundError as e:
+        instructions = get_download_instructions(language)
+        raise TTSException(f"{instructions}\n\nError: {e}")
\ No newline at end of file
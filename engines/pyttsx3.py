@@ -5,18 +5,28 @@ Offline text-to-speech using espeak backend.
 """
 
 from libs.exceptions import EngineNotAvailableError, TTSException
+from libs.tools import get_temp_directory
 import os
 import tempfile
+import threading
 import time
 import logging
-import sys
-from pathlib import Path as PathLib
-
-# Add libs to path
-sys.path.insert(0, str(PathLib(__file__).parent.parent / "libs"))
+from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Size of a WAV header without any samples
+WAV_HEADER_SIZE = 44
+# Time to wait for espeak to finish writing the file (seconds)
+WRITE_TIMEOUT = 0.5
+WRITE_POLL_INTERVAL = 0.01
+
+# Shared pyttsx3 engine (driver init and voice listing are slow)
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+# Voice id picked for each language
+_VOICE_BY_LANGUAGE: Dict[str, Optional[str]] = {}
+
 # Try to import pyttsx3
 try:
     import pyttsx3  # type: ignore
@@ -32,66 +42,95 @@ def is_available() -> bool:
     return AVAILABLE
 
 
-def generate(
-    text: str,
-    language: str = "id",
-    voice: str = None,
-    rate: int = 150,
-    volume: float = 0.9,
-    output_format: str = "wav",
-    output_path: str = None,
-    **kwargs,
-) -> bytes:
-    """
-    Generate speech using pyttsx3 (offline)
-    Args:
-        text: Text to synthesize
-        language: language code (e.g. 'id', 'en')
-        voice: voice id (optional)
-        rate: speaking rate
-        volume: volume (0.0 - 1.0)
-    Returns:
-        Audio bytes in WAV format
-    """
-    import pyttsx3
+def _get_engine():
+    """Get the pyttsx3 engine, initializing the driver on first use."""
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = pyttsx3.init()
+    return _ENGINE
 
-    engine = pyttsx3.init()
-    engine.setProperty("rate", rate)
-    engine.setProperty("volume", volume)
+
+def _find_voice(engine, language: str) -> Optional[str]:
+    """Get the voice id for language, scanning the voices once per language."""
+    if language in _VOICE_BY_LANGUAGE:
+        return _VOICE_BY_LANGUAGE[language]
 
     voices = engine.getProperty("voices")
-    if voice:
-        # Manual override jika user tentukan voice
-        engine.setProperty("voice", voice)
-    elif voices:
+    voice_id = None
+    if voices:
         # Kalau tidak ada preferensi, gunakan voice pertama
-        engine.setProperty("voice", voices[0].id)
+        voice_id = voices[0].id
         # Coba cari voice yang cocok dengan bahasa
         for v in voices:
             if hasattr(v, "languages"):
-                langs = [str(l).lower() for l in v.languages]
+                langs = [str(lang).lower() for lang in v.languages]
                 if language in langs or f"{language}_" in "".join(langs):
-                    engine.setProperty("voice", v.id)
+                    voice_id = v.id
                     break
                 elif language == "id" and ("indonesian" in v.name.lower() or "id" in v.id.lower()):
-                    engine.setProperty("voice", v.id)
+                    voice_id = v.id
                     break
+    _VOICE_BY_LANGUAGE[language] = voice_id
+    return voice_id
+
+
+def _wait_for_file(filename: str) -> None:
+    """Poll until filename has samples and stopped growing, or time out."""
+    last_size = -1
+    for _ in range(int(WRITE_TIMEOUT / WRITE_POLL_INTERVAL)):
+        size = os.path.getsize(filename) if os.path.exists(filename) else 0
+        if size > WAV_HEADER_SIZE and size == last_size:
+            return
+        last_size = size
+        time.sleep(WRITE_POLL_INTERVAL)
+
 
+def generate(text: str, config: dict) -> bytes:
+    """
+    Generate TTS and return audio as bytes.
+
+    Args:
+        text: Text to synthesize
+        config: Configuration dict with language, rate, volume and
+            optional voice (voice id, overrides the language match)
+
+    Returns:
+        Audio bytes in WAV format
+    """
     if not AVAILABLE:
         raise EngineNotAvailableError("pyttsx3 not available")
 
-    try:
+    language = config.get("language", "id")
+    rate = config.get("rate", 150)
+    volume = config.get("volume", 0.9)
+    voice = config.get("voice")
+
+    # The driver is shared: one generation at a time
+    with _ENGINE_LOCK:
+        engine = _get_engine()
+        engine.setProperty("rate", rate)
+        engine.setProperty("volume", volume)
+        # Manual override jika user tentukan voice
+        voice_id = voice or _find_voice(engine, language)
+        if voice_id:
+            engine.setProperty("voice", voice_id)
+        return _generate_to_file(engine, text)
+
 
-        # Generate to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+def _generate_to_file(engine, text: str) -> bytes:
+    try:
+        # Generate to temporary file (on tmpfs when available)
+        with tempfile.NamedTemporaryFile(
+            suffix=".wav", dir=get_temp_directory(), delete=False
+        ) as temp_file:
             temp_filename = temp_file.name
 
         try:
             engine.save_to_file(text, temp_filename)
             engine.runAndWait()
 
-            # Give time for file writing (Linux espeak issue)
-            time.sleep(0.5)
+            # Wait for the file to be written (Linux espeak issue)
+            _wait_for_file(temp_filename)
             engine.stop()
 
             # Read and return bytes
@@ -10,20 +10,17 @@ Supports: Russian, English, German, Spanish, French, Ukrainian, and more.
 import io
 import os
 import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Set, Tuple
 
+from engines import load_env
 from libs.exceptions import EngineNotAvailableError, TTSException
+from libs.formats import wav_header
+from libs.tools import split_sentences
 
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-
-    # Get project root and load .env
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    env_file = os.path.join(project_root, ".env")
-    if os.path.exists(env_file):
-        load_dotenv(env_file)
-except ImportError:
-    pass  # dotenv not installed, skip
+load_env()
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +36,33 @@ except ImportError:
         "Silero TTS not available. Install with: pip install torch torchaudio"
     )
 
+# Quantize Linear/LSTM weights to int8 at load time (opt-in)
+SILERO_QUANTIZE = os.getenv("SILERO_QUANTIZE", "0") == "1"
+
+
+def _get_threads() -> int:
+    """SILERO_THREADS, or 0 (torch default) when unset or invalid."""
+    try:
+        return max(0, int(os.getenv("SILERO_THREADS", "0")))
+    except ValueError:
+        logger.warning("Invalid SILERO_THREADS value, using torch default")
+        return 0
+
+
+# torch intra-op threads for CPU inference (0 = torch default), applied
+# once at import; torch has one thread pool, so this is process-wide
+SILERO_THREADS = _get_threads()
+if AVAILABLE and SILERO_THREADS > 0:
+    torch.set_num_threads(SILERO_THREADS)
+
+# Loaded models, keyed by (hub language, model_id)
+_MODEL_CACHE: Dict[Tuple[str, str], Any] = {}
+_MODEL_LOCK = threading.Lock()
+# Silero models are not safe to run from several threads at once
+_INFERENCE_LOCK = threading.Lock()
+# (model_id, speaker) pairs already run through a warm-up synthesis
+_WARM_SPEAKERS: Set[Tuple[str, str]] = set()
+
 
 def is_available() -> bool:
     """Check if Silero TTS is available."""
@@ -70,6 +94,7 @@ def get_model_info(language: str = "en") -> tuple:
     return language_models.get(language, language_models["en"])
 
 
+@lru_cache(maxsize=None)
 def get_models_directory() -> str:
     """
     Get the directory for storing Silero models.
@@ -81,6 +106,10 @@ def get_models_directory() -> str:
 
     Returns:
         Path to models directory
+
+    Note:
+        The result is cached; call get_models_directory.cache_clear()
+        after changing the environment at runtime.
     """
     # Get project root (parent of engines/ directory)
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -103,18 +132,107 @@ def get_models_directory() -> str:
     return os.path.expanduser("~/.cache/torch/hub")
 
 
+def _hub_language(language: str) -> str:
+    """Language passed to torch.hub.load (unsupported codes load English)."""
+    return language if language in ["ru", "en", "de", "es", "fr", "ua"] else "en"
+
+
+def get_model(language: str, model_id: str) -> Any:
+    """
+    Get a loaded Silero model, loading it on first use.
+
+    The model is cached per (hub language, model_id), so torch.hub.load
+    runs once instead of on every generate() call, and languages that
+    resolve to the same model (uk/ua, unknown codes) share one copy.
+    """
+    key = (_hub_language(language), model_id)
+    with _MODEL_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is None:
+            model = _load_model(key[0], model_id)
+            _MODEL_CACHE[key] = model
+        return model
+
+
+def _load_model(language: str, model_id: str) -> Any:
+    """Load a Silero model from torch hub and move it to the CPU."""
+    # Set custom models directory if configured
+    models_dir = get_models_directory()
+    if models_dir != os.path.expanduser("~/.cache/torch/hub"):
+        torch.hub.set_dir(models_dir)
+        logger.info(f"Using custom Silero models directory: {models_dir}")
+
+    # Load model from torch hub (cached after first download)
+    device = torch.device("cpu")  # Use CPU
+
+    # torch.hub.load returns (model, example_text)
+    result = torch.hub.load(
+        repo_or_dir="snakers4/silero-models",
+        model="silero_tts",
+        language=_hub_language(language),
+        speaker=model_id,
+        verbose=False,
+        trust_repo=True,
+    )
+
+    # Unpack result
+    if isinstance(result, tuple) and len(result) >= 2:
+        model = result[0]
+        # example_text = result[1]
+    else:
+        raise TTSException(f"Unexpected torch.hub.load result: {type(result)}")
+
+    # Check model
+    if model is None:
+        raise TTSException("Silero model failed to load")
+
+    if not hasattr(model, "apply_tts"):
+        raise TTSException(
+            f"Model has no apply_tts method. Model type: {type(model)}"
+        )
+
+    # Note: model.to() returns None for some Silero models, use in-place
+    model.to(device)
+    if SILERO_QUANTIZE:
+        model = _quantize(model)
+    return model
+
+
+def _quantize(model: Any) -> Any:
+    """
+    Apply dynamic int8 quantization to Linear and LSTM layers.
+
+    Models that cannot be quantized (e.g. TorchScript packages) are
+    returned unchanged.
+    """
+    try:
+        quantized = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8
+        )
+    except Exception as e:
+        logger.warning(f"Silero quantization failed, using float model: {e}")
+        return model
+    # Silero packages expose apply_tts on the wrapper, keep it callable
+    if not hasattr(quantized, "apply_tts"):
+        logger.warning("Quantized Silero model has no apply_tts, using float model")
+        return model
+    return quantized
+
+
 def generate(text: str, config: dict) -> bytes:
     """
     Generate TTS and return audio as bytes.
 
     Args:
         text: Text to synthesize
-        config: Configuration dict with language
+        config: Configuration dict with language and optional speaker
 
     Returns:
         Audio bytes in WAV format (48000 Hz, 16-bit, mono)
 
     Note:
+        Long text is synthesized one sentence at a time and written as a
+        single WAV.
         First run will download the model from torch hub.
         Models are cached in:
         - SILERO_MODELS_DIR env variable (highest priority), or
@@ -128,65 +246,39 @@ def generate(text: str, config: dict) -> bytes:
         )
     language = config.get("language", "en")
     try:
-        model_id, speaker, sample_rate = get_model_info(language)
-
-        # Set custom models directory if configured
-        models_dir = get_models_directory()
-        if models_dir != os.path.expanduser("~/.cache/torch/hub"):
-            torch.hub.set_dir(models_dir)
-            logger.info(f"Using custom Silero models directory: {models_dir}")
-
-        # Load model from torch hub (cached after first download)
-        device = torch.device("cpu")  # Use CPU
-
-        # torch.hub.load returns (model, example_text)
-        result = torch.hub.load(
-            repo_or_dir="snakers4/silero-models",
-            model="silero_tts",
-            language=(
-                language if language in ["ru", "en", "de", "es", "fr", "ua"] else "en"
-            ),
-            speaker=model_id,
-            verbose=False,
-            trust_repo=True,
-        )
-
-        # Unpack result
-        if isinstance(result, tuple) and len(result) >= 2:
-            model = result[0]
-            # example_text = result[1]
-        else:
-            raise TTSException(f"Unexpected torch.hub.load result: {type(result)}")
-
-        # Check model
-        if model is None:
-            raise TTSException("Silero model failed to load")
-
-        if not hasattr(model, "apply_tts"):
-            raise TTSException(
-                f"Model has no apply_tts method. Model type: {type(model)}"
+        model_id, default_speaker, sample_rate = get_model_info(language)
+        speaker = config.get("speaker") or default_speaker
+
+        model = get_model(language, model_id)
+
+        # Generate audio sentence by sentence and join the samples
+        with _INFERENCE_LOCK, torch.inference_mode():
+            audio_tensor = torch.cat(
+                [
+                    model.apply_tts(
+                        text=sentence, speaker=speaker, sample_rate=sample_rate
+                    )
+                    for sentence in split_sentences(text) or [text]
+                ]
             )
 
-        # Note: model.to() returns None for some Silero models, use in-place
-        model.to(device)
-
-        # Generate audio
-        audio_tensor = model.apply_tts(
-            text=text, speaker=speaker, sample_rate=sample_rate
+        # Multi-channel output keeps the torchaudio encoder
+        if audio_tensor.dim() > 1 and audio_tensor.size(0) > 1:
+            audio_buffer = io.BytesIO()
+            torchaudio.save(audio_buffer, audio_tensor, sample_rate, format="wav")
+            return audio_buffer.getvalue()
+
+        # Convert float samples to 16-bit PCM behind a WAV header
+        pcm: bytes = (
+            audio_tensor.reshape(-1)
+            .clamp(-1, 1)
+            .mul(32767)
+            .to(torch.int16)
+            .cpu()
+            .numpy()
+            .tobytes()
         )
-
-        # Convert tensor to WAV bytes
-        audio_buffer = io.BytesIO()
-
-        # Ensure audio is 2D (channels, samples)
-        if audio_tensor.dim() == 1:
-            audio_tensor = audio_tensor.unsqueeze(0)
-
-        # Save to buffer as WAV
-        torchaudio.save(audio_buffer, audio_tensor, sample_rate, format="wav")
-
-        audio_buffer.seek(0)
-        return audio_buffer.getvalue()
+        return wav_header(1, 2, sample_rate, len(pcm)) + pcm
 
     except Exception as e:
         error_msg = str(e)
@@ -201,4 +293,44 @@ def generate(text: str, config: dict) -> bytes:
         if "model" in error_msg.lower() and "not found" in error_msg.lower():
             raise TTSException(f"Silero model not found for language.\n" f"Error: {e}")
 
-        raise TTSException(f"Silero TTS generation failed: {e}")
\ No newline at end of file
+        raise TTSException(f"Silero TTS generation failed: {e}")
+
+
+def preload(config: dict) -> None:
+    """
+    Load the model for config language and warm up its speaker.
+
+    TorchScript profiles and optimizes the graph on the first runs, so one
+    short synthesis per (model, speaker) moves that cost out of the first
+    real request.
+
+    Args:
+        config: Configuration dict with language and optional speaker
+    """
+    if not AVAILABLE:
+        raise EngineNotAvailableError(
+            "Silero TTS not available. Install with: pip install torch torchaudio\n"
+            "See docs/SILEROTTS.md for setup instructions."
+        )
+    language = config.get("language", "en")
+    model_id, default_speaker, sample_rate = get_model_info(language)
+    speaker = config.get("speaker") or default_speaker
+    model = get_model(language, model_id)
+
+    speakers = getattr(model, "speakers", None)
+    if speakers is not None and speaker not in speakers:
+        raise TTSException(
+            f"Unknown Silero speaker '{speaker}' for {model_id}. "
+            f"Available: {', '.join(speakers)}"
+        )
+    # Check, warm up and mark under the inference lock, so concurrent
+    # preloads run the warm-up once and never alongside generate()
+    with _INFERENCE_LOCK:
+        if (model_id, speaker) in _WARM_SPEAKERS:
+            return
+        try:
+            with torch.inference_mode():
+                model.apply_tts(text="Ok.", speaker=speaker, sample_rate=sample_rate)
+        except Exception as e:
+            raise TTSException(f"Silero TTS warm-up failed: {e}")
+        _WARM_SPEAKERS.add((model_id, speaker))
\ No newline at end of file
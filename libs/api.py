@@ -5,34 +5,34 @@ Main public API for text-to-speech operations.
 Engines return bytes, API handles file saving and playback.
 """
 
-from . import playback
+from . import cache, playback
+from .formats import join_audio, sniff
 from .tools import (
     get_default_config,
     validate_text,
     validate_engine,
     validate_language,
+    split_sentences,
+)
+from engines import (
+    get_engine_function,
+    get_engine_batch_function,
+    get_engine_stream_function,
+    get_engine_preload_function,
 )
-from engines import get_engine_function
 import io
-import sys
+import os
+import wave
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pathlib import Path
-from typing import Union, Optional, cast
+from typing import Union, Optional, Iterator, List, Tuple, cast
 import logging
 
 # Import exceptions for export
 from libs.exceptions import ValidationError
-from libs.exceptions import EngineNotAvailableError
-
-# Import dynamic engine loader
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-# Import tools
-
-# Import playback
+from libs.exceptions import EngineNotAvailableError, TTSException
 
-# Configure logging
-logging.basicConfig(level=logging.WARNING)
+# Logging is configured by the application (cli.py, play.py), not here
 logger = logging.getLogger(__name__)
 
 # Type definitions
@@ -72,8 +72,222 @@ def text_to_speech_bytes(
             f"Please check if the engine module exists and its dependencies are installed."
         )
 
+    # Repeated phrases are served from the cache when it is enabled
+    key = None
+    if cache.is_enabled():
+        key = cache.cache_key(validated_text, validated_engine, validated_language)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
     # Generate audio bytes
-    return cast(bytes, generate_func(validated_text, config))
+    audio_bytes = cast(bytes, generate_func(validated_text, config))
+    if key is not None:
+        cache.put(key, audio_bytes)
+    return audio_bytes
+
+
+def text_to_speech_bytes_batch(
+    texts: List[str], engine: str = "gtts", language: str = "en"
+) -> List[bytes]:
+    """
+    Convert several texts to speech with one engine call when supported.
+
+    Engines implementing generate_batch() get all texts at once; other
+    engines are called once per text. Texts found in the audio cache are
+    not sent to the engine.
+
+    Args:
+        texts: Texts to synthesize
+        engine: Engine name (gtts, pyttsx3, piper, etc.)
+        language: Language code
+
+    Returns:
+        List of audio bytes, in the order of texts
+
+    Raises:
+        EngineNotAvailableError: If engine is not available
+    """
+    validated_texts = [validate_text(text) for text in texts]
+    validated_engine = validate_engine(engine)
+    validated_language = validate_language(language)
+
+    config = get_default_config()
+    config.update({"engine": validated_engine, "language": validated_language})
+
+    generate_func = get_engine_function(validated_engine)
+    if generate_func is None:
+        raise EngineNotAvailableError(
+            f"Engine '{validated_engine}' is not available. "
+            f"Please check if the engine module exists and its dependencies are installed."
+        )
+
+    # Repeated phrases are served from the cache when it is enabled
+    results: List[Optional[bytes]] = [None] * len(validated_texts)
+    keys: List[Optional[str]] = [None] * len(validated_texts)
+    if cache.is_enabled():
+        for i, text in enumerate(validated_texts):
+            keys[i] = cache.cache_key(text, validated_engine, validated_language)
+            results[i] = cache.get(cast(str, keys[i]))
+
+    missing = [i for i, audio_bytes in enumerate(results) if audio_bytes is None]
+    if not missing:
+        return cast(List[bytes], results)
+    missing_texts = [validated_texts[i] for i in missing]
+
+    batch_func = get_engine_batch_function(validated_engine)
+    if batch_func is not None:
+        generated = list(batch_func(missing_texts, config))
+    else:
+        generated = [cast(bytes, generate_func(text, config)) for text in missing_texts]
+
+    for i, audio_bytes in zip(missing, generated):
+        results[i] = audio_bytes
+        key = keys[i]
+        if key is not None:
+            cache.put(key, audio_bytes)
+    return cast(List[bytes], results)
+
+
+def text_to_speech_bytes_parallel(
+    text: str,
+    engine: str = "gtts",
+    language: str = "en",
+    workers: Optional[int] = None,
+) -> bytes:
+    """
+    Convert text to speech synthesizing its sentences in parallel.
+
+    Sentences are generated by a thread pool (ONNX Runtime and PyTorch
+    release the GIL during inference) and joined in order: WAV output is
+    merged into one WAV, MP3 frames are concatenated. Silero and Coqui
+    serialize inference on their shared model, so they gain little here.
+
+    Args:
+        text: Text to synthesize
+        engine: Engine name (gtts, pyttsx3, piper, etc.)
+        language: Language code
+        workers: Number of parallel sentences (default: CPU count)
+
+    Returns:
+        Audio bytes
+
+    Raises:
+        EngineNotAvailableError: If engine is not available
+    """
+    validated_text = validate_text(text)
+    validated_engine = validate_engine(engine)
+    validated_language = validate_language(language)
+
+    config = get_default_config()
+    config.update({"engine": validated_engine, "language": validated_language})
+
+    generate_func = get_engine_function(validated_engine)
+    if generate_func is None:
+        raise EngineNotAvailableError(
+            f"Engine '{validated_engine}' is not available. "
+            f"Please check if the engine module exists and its dependencies are installed."
+        )
+
+    sentences = split_sentences(validated_text)
+    if len(sentences) == 1:
+        return cast(bytes, generate_func(sentences[0], config))
+
+    max_workers = min(workers or os.cpu_count() or 1, len(sentences))
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        parts = list(ex.map(lambda sentence: generate_func(sentence, config), sentences))
+    return join_audio(parts)
+
+
+def text_to_speech_stream(
+    text: str, engine: str = "gtts", language: str = "en"
+) -> Iterator[Tuple[bytes, int]]:
+    """
+    Convert text to speech sentence by sentence.
+
+    Engines implementing generate_stream() are streamed directly; other
+    engines are called once per sentence and must return 16-bit mono WAV.
+
+    Args:
+        text: Text to synthesize
+        engine: Engine name (pipertts, silerotts, etc.)
+        language: Language code
+
+    Yields:
+        (pcm, sample_rate) - 16-bit mono PCM samples, in order
+
+    Raises:
+        EngineNotAvailableError: If engine is not available
+        TTSException: If the engine output cannot be streamed as PCM
+    """
+    validated_text = validate_text(text)
+    validated_engine = validate_engine(engine)
+    validated_language = validate_language(language)
+
+    config = get_default_config()
+    config.update({"engine": validated_engine, "language": validated_language})
+
+    stream_func = get_engine_stream_function(validated_engine)
+    if stream_func is not None:
+        yield from stream_func(validated_text, config)
+        return
+
+    generate_func = get_engine_function(validated_engine)
+    if generate_func is None:
+        raise EngineNotAvailableError(
+            f"Engine '{validated_engine}' is not available. "
+            f"Please check if the engine module exists and its dependencies are installed."
+        )
+
+    for sentence in split_sentences(validated_text):
+        audio_bytes = cast(bytes, generate_func(sentence, config))
+        if not audio_bytes.startswith(b"RIFF"):
+            raise TTSException(
+                f"Engine '{validated_engine}' does not return WAV, cannot stream PCM"
+            )
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                raise TTSException(
+                    f"Engine '{validated_engine}' does not return 16-bit mono WAV"
+                )
+            yield wf.readframes(wf.getnframes()), wf.getframerate()
+
+
+def preload(
+    engine: str = "gtts", language: str = "en", speaker: Optional[str] = None
+) -> None:
+    """
+    Load engine models for a language ahead of the first request.
+
+    Useful for servers that want to pay model load time at startup.
+    Engines without anything to load are only checked for availability.
+
+    Args:
+        engine: Engine name (gtts, pyttsx3, piper, etc.)
+        language: Language code
+        speaker: Speaker/voice to warm up, for engines that have several
+            (e.g. silerotts); default is the engine's voice for language
+
+    Raises:
+        EngineNotAvailableError: If engine is not available
+    """
+    validated_engine = validate_engine(engine)
+    validated_language = validate_language(language)
+
+    if get_engine_function(validated_engine) is None:
+        raise EngineNotAvailableError(
+            f"Engine '{validated_engine}' is not available. "
+            f"Please check if the engine module exists and its dependencies are installed."
+        )
+
+    config = get_default_config()
+    config.update({"engine": validated_engine, "language": validated_language})
+    if speaker:
+        config["speaker"] = speaker
+
+    preload_func = get_engine_preload_function(validated_engine)
+    if preload_func is not None:
+        preload_func(config)
 
 
 def text_to_speech_file(
@@ -101,11 +315,7 @@ def text_to_speech_file(
     if filename is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         # Determine extension based on content
-        extension = (
-            "mp3"
-            if audio_bytes.startswith(b"ID3") or audio_bytes[0:2] == b"\xff\xfb"
-            else "wav"
-        )
+        extension = sniff(audio_bytes) or "wav"
         filename = f"{timestamp}.{extension}"
 
     # Save to file
@@ -133,6 +343,11 @@ def play_audio_bytes(audio_bytes: bytes) -> None:
     playback.play_bytes(audio_bytes)
 
 
+def play_audio_stream(chunks: Iterator[Tuple[bytes, int]]) -> None:
+    """Play (pcm, sample_rate) chunks as they are produced."""
+    playback.play_stream(chunks)
+
+
 def play_audio(audio_source: AudioSource) -> None:
     """Play audio from file or bytes."""
     playback.play(audio_source)
@@ -0,0 +1,144 @@
+"""
+Audio Cache Module
+
+Opt-in cache of generated audio keyed by (text, engine, language), for
+phrases that are synthesized again and again (prompts, error messages).
+
+Settings (environment):
+    TTS_CACHE_SIZE: number of entries kept in memory (default 0 - off)
+    TTS_CACHE_DIR: directory for the on-disk cache (default unset - off)
+    TTS_CACHE_MAX_MB: size limit of the on-disk cache (default 0 - no limit)
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_MEMORY: "OrderedDict[str, bytes]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _env_int(name: str) -> int:
+    try:
+        return max(0, int(os.getenv(name, "0")))
+    except ValueError:
+        return 0
+
+
+def is_enabled() -> bool:
+    """Check if any cache level is configured."""
+    return _env_int("TTS_CACHE_SIZE") > 0 or bool(os.getenv("TTS_CACHE_DIR"))
+
+
+def cache_key(text: str, engine: str, language: str) -> str:
+    """Hash text, engine and language into a cache key."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (text, engine, language):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get(key: str) -> Optional[bytes]:
+    """Look up audio in memory, then on disk; None on a miss."""
+    with _LOCK:
+        data = _MEMORY.get(key)
+        if data is not None:
+            _MEMORY.move_to_end(key)
+            return data
+
+    cache_dir = os.getenv("TTS_CACHE_DIR")
+    if not cache_dir:
+        return None
+    try:
+        with open(os.path.join(cache_dir, f"{key}.bin"), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    _remember(key, data)
+    return data
+
+
+def put(key: str, data: bytes) -> None:
+    """Store audio in the configured cache levels."""
+    _remember(key, data)
+
+    cache_dir = os.getenv("TTS_CACHE_DIR")
+    if not cache_dir:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first so readers never see partial data
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{key}.bin"))
+        _trim_disk(cache_dir)
+    except OSError as e:
+        logger.warning(f"Failed to write TTS cache entry {key}: {e}")
+
+
+def copy_to(key: str, filename: str) -> bool:
+    """
+    Copy a disk cache entry to filename without reading it into memory.
+
+    The entry is copied, not linked, so editing the output file in place
+    cannot change the cache.
+
+    Returns:
+        False if there is no disk entry for key
+    """
+    cache_dir = os.getenv("TTS_CACHE_DIR")
+    if not cache_dir:
+        return False
+    cached_path = os.path.join(cache_dir, f"{key}.bin")
+    try:
+        shutil.copyfile(cached_path, filename)
+    except OSError:
+        return False
+    return True
+
+
+def clear() -> None:
+    """Drop all in-memory entries."""
+    with _LOCK:
+        _MEMORY.clear()
+
+
+def _remember(key: str, data: bytes) -> None:
+    size = _env_int("TTS_CACHE_SIZE")
+    if size == 0:
+        return
+    with _LOCK:
+        _MEMORY[key] = data
+        _MEMORY.move_to_end(key)
+        while len(_MEMORY) > size:
+            _MEMORY.popitem(last=False)
+
+
+def _trim_disk(cache_dir: str) -> None:
+    """Delete the oldest entries while the cache is over TTS_CACHE_MAX_MB."""
+    max_bytes = _env_int("TTS_CACHE_MAX_MB") * 1024 * 1024
+    if max_bytes == 0:
+        return
+    entries = [
+        (entry.stat(), entry.path)
+        for entry in os.scandir(cache_dir)
+        if entry.is_file() and entry.name.endswith(".bin")
+    ]
+    total = sum(st.st_size for st, _ in entries)
+    for st, path in sorted(entries, key=lambda item: item[0].st_mtime):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+            total -= st.st_size
+        except OSError:
+            pass
@@ -0,0 +1,93 @@
+"""
+Audio Formats Module
+
+Detection of audio container formats from their leading bytes, WAV
+header construction and joining of audio parts.
+"""
+
+import io
+import struct
+import wave
+from typing import Dict, List, Optional, Tuple, cast
+
+from .exceptions import TTSException
+
+# RIFF/data size of a WAV whose length is not known yet (streaming)
+WAV_UNKNOWN_SIZE = 0xFFFFFFFF
+
+# Container formats by their 4-byte magic (RIFF must also say WAVE)
+CONTAINER_MAGIC: Dict[bytes, str] = {
+    b"RIFF": "wav",
+    b"OggS": "ogg",
+}
+# Form type at bytes 8-12 of a RIFF WAV
+WAVE_TAG = b"WAVE"
+# Leading ID3v2 tag of an MP3
+ID3_MAGIC = b"ID3"
+
+
+def wav_header(
+    nchannels: int, sampwidth: int, framerate: int, data_size: int
+) -> bytes:
+    """Build the 44-byte header of a PCM WAV holding data_size bytes."""
+    riff_size = WAV_UNKNOWN_SIZE if data_size == WAV_UNKNOWN_SIZE else 36 + data_size
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        riff_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        nchannels,
+        framerate,
+        framerate * nchannels * sampwidth,
+        nchannels * sampwidth,
+        sampwidth * 8,
+        b"data",
+        data_size,
+    )
+
+
+def sniff(audio_bytes: bytes) -> Optional[str]:
+    """
+    Detect audio format from the first bytes.
+
+    MP3 is recognized by an ID3 tag or an MPEG frame sync word (11 set bits),
+    not only the common 0xFFFB header.
+
+    Args:
+        audio_bytes: Audio data (only the first 12 bytes are inspected)
+
+    Returns:
+        "mp3", "wav", "ogg" or None if the format is unknown
+    """
+    head = memoryview(audio_bytes)[:12]
+    if head[:3] == ID3_MAGIC or (
+        len(head) >= 2 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0
+    ):
+        return "mp3"
+    audio_format = CONTAINER_MAGIC.get(head[:4].tobytes())
+    if audio_format == "wav" and head[8:12] != WAVE_TAG:
+        return None
+    return audio_format
+
+
+def join_audio(parts: List[bytes]) -> bytes:
+    """Join WAV parts with equal parameters into one WAV; concatenate others."""
+    if not all(sniff(part) == "wav" for part in parts):
+        return b"".join(parts)
+
+    frames = []
+    params = None
+    for part in parts:
+        with wave.open(io.BytesIO(part), "rb") as wf:
+            part_params = (wf.getnchannels(), wf.getsampwidth(), wf.getframerate())
+            if params is None:
+                params = part_params
+            elif part_params != params:
+                raise TTSException("Cannot join WAV parts with different formats")
+            frames.append(wf.readframes(wf.getnframes()))
+    pcm = b"".join(frames)
+    nchannels, sampwidth, framerate = cast(Tuple[int, int, int], params)
+    return wav_header(nchannels, sampwidth, framerate, len(pcm)) + pcm
@@ -4,12 +4,16 @@ Audio Playback Module
 Handles audio playback using pygame.
 """
 
+import io
 import os
 import tempfile
 import logging
-from typing import Union
+import wave
+from typing import Iterable, Optional, Tuple, Union
 
 from .exceptions import EngineNotAvailableError, TTSException, ValidationError
+from .formats import sniff
+from .tools import get_temp_directory
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -17,12 +21,23 @@ logger = logging.getLogger(__name__)
 # Type definitions
 AudioSource = Union[str, bytes]
 
+# Poll interval while waiting on streamed playback (ms)
+STREAM_POLL_MS = 20
+# Poll interval while waiting on file playback without an event queue (ms)
+MUSIC_POLL_MS = 10
+
+# (sample_rate, channels) the mixer was last initialized with
+_CURRENT_FMT: Optional[Tuple[int, int]] = None
+
 # Try to import pygame
 try:
     os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
     import pygame
     from pygame import mixer
 
+    # Posted by mixer.music when playback ends
+    MUSIC_END_EVENT = pygame.USEREVENT + 1
+
     PYGAME_AVAILABLE = True
 except ImportError:
     PYGAME_AVAILABLE = False
@@ -34,6 +49,54 @@ def is_available() -> bool:
     return PYGAME_AVAILABLE
 
 
+def _init_mixer(sample_rate: int, channels: int) -> None:
+    """
+    Quit and reinitialize mixer with correct settings.
+
+    Reinitializing tears down the audio device, so it is skipped when the
+    mixer is already running with the same sample rate and channels.
+    """
+    global _CURRENT_FMT
+    fmt = (sample_rate, channels)
+    if _CURRENT_FMT == fmt and mixer.get_init():
+        return
+
+    try:
+        mixer.quit()
+    except pygame.error:
+        pass
+
+    # allowedchanges=0: the device must open with exactly this format, raw
+    # mixer.Sound buffers would otherwise play at the wrong speed or pitch
+    mixer.init(
+        frequency=sample_rate,
+        size=-16,
+        channels=channels,
+        buffer=2048,
+        allowedchanges=0,
+    )
+    _CURRENT_FMT = fmt
+
+
+def _wait_music_end_event() -> None:
+    """Block until mixer.music posts MUSIC_END_EVENT.
+
+    Other events received meanwhile are posted back for the application.
+    """
+    other_events = []
+    try:
+        while mixer.music.get_busy():
+            # Timeout guards against an end event that was never posted
+            event = pygame.event.wait(250)
+            if event.type == MUSIC_END_EVENT:
+                break
+            if event.type != pygame.NOEVENT:
+                other_events.append(event)
+    finally:
+        for event in other_events:
+            pygame.event.post(event)
+
+
 def play_file(filename: str) -> None:
     """Play audio from file."""
     if not PYGAME_AVAILABLE:
@@ -49,8 +112,6 @@ def play_file(filename: str) -> None:
 
         if filename.endswith(".wav"):
             try:
-                import wave
-
                 with wave.open(filename, "rb") as wf:
                     sample_rate = wf.getframerate()
                     channels = wf.getnchannels()
@@ -59,20 +120,48 @@ def play_file(filename: str) -> None:
                 sample_rate = 22050
                 channels = 1
 
-        # Quit and reinitialize mixer with correct settings
-        try:
-            mixer.quit()
-        except pygame.error:
-            pass
-
-        mixer.init(frequency=sample_rate, size=-16, channels=channels, buffer=2048)
+        _init_mixer(sample_rate, channels)
         mixer.music.load(filename)
+        # The event queue only works with an initialized display
+        use_events = pygame.display.get_init()
+        mixer.music.set_endevent(MUSIC_END_EVENT if use_events else pygame.NOEVENT)
         mixer.music.play()
 
-        while mixer.music.get_busy():
-            pygame.time.wait(100)
+        if use_events:
+            _wait_music_end_event()
+        else:
+            while mixer.music.get_busy():
+                pygame.time.wait(MUSIC_POLL_MS)
+    except Exception as e:
+        raise TTSException(f"Audio playback failed: {e}")
+
+
+def _play_wav_bytes(audio_bytes: bytes) -> bool:
+    """
+    Play 16-bit PCM WAV bytes through mixer.Sound.
+
+    Returns:
+        False if the WAV cannot be played from memory (e.g. not 16-bit),
+        so the caller should fall back to a temporary file
+    """
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wf:
+            if wf.getsampwidth() != 2:
+                return False
+            sample_rate = wf.getframerate()
+            channels = wf.getnchannels()
+            pcm = wf.readframes(wf.getnframes())
+    except (wave.Error, EOFError):
+        return False
+
+    try:
+        _init_mixer(sample_rate, channels)
+        channel = mixer.Sound(buffer=pcm).play()
+        while channel is not None and channel.get_busy():
+            pygame.time.wait(MUSIC_POLL_MS)
     except Exception as e:
         raise TTSException(f"Audio playback failed: {e}")
+    return True
 
 
 def play_bytes(audio_bytes: bytes) -> None:
@@ -81,11 +170,17 @@ def play_bytes(audio_bytes: bytes) -> None:
         raise EngineNotAvailableError("pygame not available for audio playback")
 
     # Detect file format from bytes header
-    suffix = ".mp3"
-    if audio_bytes.startswith(b"RIFF"):
-        suffix = ".wav"
+    audio_format = sniff(audio_bytes) or "mp3"
 
-    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+    # 16-bit WAV goes to the mixer from memory, no temporary file
+    if audio_format == "wav" and _play_wav_bytes(audio_bytes):
+        return
+
+    suffix = f".{audio_format}"
+
+    with tempfile.NamedTemporaryFile(
+        suffix=suffix, delete=False, dir=get_temp_directory()
+    ) as temp_file:
         temp_filename = temp_file.name
         temp_file.write(audio_bytes)
         temp_file.flush()
@@ -98,6 +193,40 @@ def play_bytes(audio_bytes: bytes) -> None:
             os.unlink(temp_filename)
 
 
+def play_stream(chunks: Iterable[Tuple[bytes, int]]) -> None:
+    """
+    Play 16-bit mono PCM chunks as they are produced.
+
+    The first chunk starts playing as soon as it arrives; each next one is
+    queued on the same channel while the previous plays, so synthesis of
+    later chunks overlaps playback.
+
+    Args:
+        chunks: Iterable of (pcm, sample_rate)
+    """
+    if not PYGAME_AVAILABLE:
+        raise EngineNotAvailableError("pygame not available for audio playback")
+
+    try:
+        channel = None
+        for pcm, sample_rate in chunks:
+            if channel is None:
+                _init_mixer(sample_rate, 1)
+                channel = mixer.Sound(buffer=pcm).play()
+                continue
+            # Only one sound can wait in a channel queue
+            while channel.get_queue() is not None:
+                pygame.time.wait(STREAM_POLL_MS)
+            channel.queue(mixer.Sound(buffer=pcm))
+
+        while channel is not None and channel.get_busy():
+            pygame.time.wait(STREAM_POLL_MS)
+    except TTSException:
+        raise
+    except Exception as e:
+        raise TTSException(f"Audio playback failed: {e}")
+
+
 def play(audio_source: AudioSource) -> None:
     """
     Play audio from file path or bytes.
@@ -4,18 +4,31 @@ TTS Tools and Utilities
 Validation, configuration, functional programming helpers, and utilities.
 """
 
-from engines import is_engine_available, get_engine_function
+from engines import is_engine_available, get_engine_function, resolve_engine_name
 import os
 import logging
-from datetime import datetime
+import re
+import secrets
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from itertools import chain
 from pathlib import Path
-from typing import Callable, Dict, List, Any, Optional, Union, cast
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Any, Mapping, Optional, Set, Union, cast
 import io
 
+from . import cache
+from .formats import join_audio, sniff
 from .exceptions import TTSException, EngineNotAvailableError, ValidationError
 import sys
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Project root, for the engines package; inserted once
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -23,16 +36,46 @@ logger = logging.getLogger(__name__)
 # Type definitions
 Config = Dict[str, Any]
 
+# Whitespace after a sentence terminator (including CJK full-width ones)
+SENTENCE_REGEX = re.compile(r"(?<=[.!?。！？])\s+")
+# Whitespace after a clause separator
+CLAUSE_REGEX = re.compile(r"(?<=[,;:，；])\s+")
 
-def get_default_config() -> Config:
-    """Get default configuration for TTS operations."""
-    return {
+# Default configuration for TTS operations, read-only
+DEFAULT_CONFIG: Mapping[str, Any] = MappingProxyType(
+    {
         "engine": "gtts",
         "language": "en",
         "rate": 150,
         "volume": 0.9,
         "slow": False,
     }
+)
+
+# Lowercase language codes accepted by validate_language without further checks
+KNOWN_LANGUAGES = frozenset(
+    {
+        "ar", "de", "en", "es", "fr", "hi", "id", "it", "ja", "ko",
+        "nl", "pl", "pt", "ru", "sv", "tr", "ua", "uk", "zh",
+    }
+)
+
+# Hard ceiling on text length before stripping (5000 + whitespace padding)
+MAX_RAW_TEXT_LENGTH = 20000
+
+# Directories already created by ensure_audio_directory()
+_ENSURED_DIRS: Set[str] = set()
+_ENSURED_LOCK = threading.Lock()
+
+# Texts synthesized concurrently by batch_tts
+BATCH_MAX_WORKERS = 32
+# batch_tts texts longer than this are split and synthesized in parallel
+BATCH_SPLIT_CHARS = 500
+
+
+def get_default_config() -> Config:
+    """Get default configuration for TTS operations (a fresh, mutable copy)."""
+    return dict(DEFAULT_CONFIG)
 
 
 def validate_text(text: str) -> str:
@@ -40,7 +83,15 @@ def validate_text(text: str) -> str:
     if not isinstance(text, str):
         raise ValidationError("Text must be a string")
 
-    cleaned_text = text.strip()
+    # Reject huge input before strip() copies it
+    if len(text) > MAX_RAW_TEXT_LENGTH:
+        raise ValidationError("Text too long (max 5000 characters)")
+
+    # strip() copies the string, skip it when there is nothing to strip
+    if text and not (text[0].isspace() or text[-1].isspace()):
+        cleaned_text = text
+    else:
+        cleaned_text = text.strip()
     if not cleaned_text:
         raise ValidationError("Text cannot be empty")
 
@@ -55,17 +106,22 @@ def validate_engine(engine: str) -> str:
     Validate TTS engine type using dynamic engine loading.
 
     Checks if engine module exists in engines/ directory and if its
-    dependencies are installed.
+    dependencies are installed. Successful results are cached per engine
+    name; call validate_engine.cache_clear() after installing an engine
+    at runtime.
     """
     if not isinstance(engine, str) or not engine:
         raise ValidationError("Engine name must be a non-empty string")
 
+    return _validate_engine_cached(engine)
+
+
+@lru_cache(maxsize=64)
+def _validate_engine_cached(engine: str) -> str:
     # Check if engine module exists and is available
     if not is_engine_available(engine):
-        # Check if module file exists
-        from pathlib import Path
-
-        engine_file = Path(__file__).parent.parent / "engines" / f"{engine}.py"
+        module_name = resolve_engine_name(engine)
+        engine_file = Path(__file__).parent.parent / "engines" / f"{module_name}.py"
 
         if not engine_file.exists():
             raise ValidationError(
@@ -76,15 +132,30 @@ def validate_engine(engine: str) -> str:
         else:
             raise EngineNotAvailableError(
                 f"Engine '{engine}' module found but dependencies not installed.\n"
-                f"Check engines/{engine}.py for required packages."
+                f"Check engines/{module_name}.py for required packages."
             )
 
     return engine
 
 
+validate_engine.cache_clear = _validate_engine_cached.cache_clear  # type: ignore[attr-defined]
+
+
 def validate_language(language: str) -> str:
     """Validate language code."""
-    if not isinstance(language, str) or len(language) != 2:
+    if not isinstance(language, str):
+        raise ValidationError("Language must be a 2-character code")
+
+    # Common codes are already canonical
+    if language in KNOWN_LANGUAGES:
+        return language
+
+    return _validate_language_cached(language)
+
+
+@lru_cache(maxsize=64)
+def _validate_language_cached(language: str) -> str:
+    if len(language) != 2:
         raise ValidationError("Language must be a 2-character code")
 
     return language.lower()
@@ -110,9 +181,11 @@ def get_engine_generate_function(engine_name: str) -> Callable[..., Any]:
 
 def compose(*functions: Callable) -> Callable:
     """Compose multiple functions into a single function."""
+    # Reverse once here instead of on every call
+    ordered = tuple(reversed(functions))
 
     def composed(x: Any) -> Any:
-        for f in reversed(functions):
+        for f in ordered:
             x = f(x)
         return x
 
@@ -123,6 +196,7 @@ def with_engine(engine: str) -> Callable[..., Any]:
     """Create a function that uses the given engine."""
 
     def engine_wrapper(func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             kwargs["engine"] = engine
             return func(*args, **kwargs)
@@ -136,6 +210,7 @@ def with_language(language: str) -> Callable[..., Any]:
     """Create a function that uses the given language."""
 
     def language_wrapper(func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             kwargs["language"] = language
             return func(*args, **kwargs)
@@ -147,28 +222,26 @@ def with_language(language: str) -> Callable[..., Any]:
 
 def create_tts_pipeline(engine: str = "gtts", language: str = "en") -> Callable:
     """Create a TTS pipeline with predefined settings."""
-    # Import here to avoid circular import
-    import sys
-    from pathlib import Path
-
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from libs.api import (
-        text_to_speech_file,
-        text_to_speech_bytes,
-        text_to_speech_bytesio,
-    )
+    # Imported here: libs.api imports this module. The functions are looked
+    # up on the module per call, so patches and reloads of libs.api apply
+    from libs import api
+
+    dispatch: Dict[str, Callable[[str, Optional[str]], Any]] = {
+        "file": lambda text, filename: api.text_to_speech_file(
+            text, filename, engine, language
+        ),
+        "bytes": lambda text, _: api.text_to_speech_bytes(text, engine, language),
+        "bytesio": lambda text, _: api.text_to_speech_bytesio(text, engine, language),
+    }
 
     def pipeline(
         text: str, output_format: str = "file", filename: Optional[str] = None
     ) -> Union[str, bytes, io.BytesIO]:
-        if output_format == "file":
-            return text_to_speech_file(text, filename, engine, language)
-        elif output_format == "bytes":
-            return text_to_speech_bytes(text, engine, language)
-        elif output_format == "bytesio":
-            return text_to_speech_bytesio(text, engine, language)
-        else:
+        try:
+            output = dispatch[output_format]
+        except KeyError:
             raise ValidationError("output_format must be 'file', 'bytes', or 'bytesio'")
+        return cast(Union[str, bytes, io.BytesIO], output(text, filename))
 
     return pipeline
 
@@ -179,32 +252,144 @@ def batch_tts(
     language: str = "en",
     output_dir: str = "audio",
 ) -> List[str]:
-    """Process multiple texts in batch."""
+    """
+    Process multiple texts in batch.
+
+    Texts are synthesized concurrently (up to BATCH_MAX_WORKERS at a time);
+    texts longer than BATCH_SPLIT_CHARS are split at sentence boundaries
+    and their chunks synthesized in parallel too, then joined into one
+    file. The returned filenames keep the order of texts.
+    """
     if not isinstance(texts, list) or not texts:
         raise ValidationError("texts must be a non-empty list")
 
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    ensure_audio_directory(output_dir)
 
     pipeline = create_tts_pipeline(engine, language)
-    generated_files = []
 
-    for i, text in enumerate(texts):
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(output_dir, f"{timestamp}.mp3")
+    # One timestamp for the batch, the index keeps filenames unique
+    timestamp = unique_timestamp()
+    filenames = [
+        os.path.join(output_dir, generate_timestamp_filename("", "mp3", i, timestamp))
+        for i in range(len(texts))
+    ]
+
+    def process(text: str, filename: str) -> str:
+        # Texts already on the disk cache are copied, not synthesized
+        if cache.is_enabled():
+            key = cache.cache_key(
+                validate_text(text),
+                validate_engine(engine),
+                validate_language(language),
+            )
+            if cache.copy_to(key, filename):
+                return filename
+
+        return cast(str, pipeline(text, "file", filename))
 
-            result_filename = pipeline(text, "file", filename)
-            generated_files.append(result_filename)
-        except Exception as e:
-            logger.error(f"Failed to process text {i}: {e}")
-            raise TTSException(f"Batch processing failed at item {i}: {e}")
+    # Long texts are split, their chunks are synthesized alongside other items
+    chunk_lists = [_batch_chunks(text) for text in texts]
+    total_chunks = sum(len(chunks) for chunks in chunk_lists)
+
+    generated_files = []
+    with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, total_chunks)) as ex:
+        jobs = [
+            [ex.submit(process, text, filename)]
+            if len(chunks) == 1
+            else [ex.submit(pipeline, chunk, "bytes") for chunk in chunks]
+            for text, filename, chunks in zip(texts, filenames, chunk_lists)
+        ]
+        for i, (futures, filename) in enumerate(zip(jobs, filenames)):
+            try:
+                if len(futures) == 1:
+                    generated_files.append(futures[0].result())
+                else:
+                    _write_parts([future.result() for future in futures], filename)
+                    generated_files.append(filename)
+            except Exception as e:
+                for pending in chain.from_iterable(jobs[i:]):
+                    pending.cancel()
+                logger.error(f"Failed to process text {i}: {e}")
+                raise TTSException(f"Batch processing failed at item {i}: {e}")
 
     return generated_files
 
 
-def generate_timestamp_filename(prefix: str = "", extension: str = "mp3") -> str:
-    """Generate filename with timestamp only."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+def _batch_chunks(text: str) -> List[str]:
+    """Chunks to synthesize for a batch text (invalid text is left to the pipeline)."""
+    try:
+        cleaned_text = validate_text(text)
+    except ValidationError:
+        return [text]
+    if len(cleaned_text) <= BATCH_SPLIT_CHARS:
+        return [text]
+    return _split_for_tts(cleaned_text, BATCH_SPLIT_CHARS)
+
+
+def _split_for_tts(text: str, max_chars: int = 500) -> List[str]:
+    """
+    Split text into chunks of at most max_chars characters.
+
+    Text is cut at sentence ends first, then after commas, then between
+    words; neighbouring pieces are packed back together up to max_chars.
+    """
+    chunks: List[str] = []
+    for piece in _split_pieces(text, max_chars):
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def _split_pieces(text: str, max_chars: int) -> Iterator[str]:
+    for sentence in split_sentences(text):
+        if len(sentence) <= max_chars:
+            yield sentence
+            continue
+        for clause in CLAUSE_REGEX.split(sentence):
+            if len(clause) <= max_chars:
+                yield clause
+            else:
+                yield from textwrap.wrap(clause, max_chars, break_on_hyphens=False)
+
+
+def _write_parts(parts: List[bytes], filename: str) -> None:
+    """Write the audio of a split text: WAV parts joined, others concatenated."""
+    with open(filename, "wb") as f:
+        if all(sniff(part) == "wav" for part in parts):
+            f.write(join_audio(parts))
+        else:
+            # MP3 frames can be written one part after another
+            for part in parts:
+                f.write(part)
+
+
+def unique_timestamp() -> str:
+    """Current time as YYYYMMDD_HHMMSS plus a random suffix, unique per call."""
+    return f"{time.strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}"
+
+
+def generate_timestamp_filename(
+    prefix: str = "",
+    extension: str = "mp3",
+    index: Optional[int] = None,
+    timestamp: Optional[str] = None,
+) -> str:
+    """
+    Generate a sortable, unique filename: timestamp plus a random suffix.
+
+    Args:
+        prefix: Optional filename prefix
+        extension: File extension
+        index: Optional item number, appended as _NNNNN instead of the
+            random suffix (for names sharing one timestamp)
+        timestamp: Timestamp to use instead of the current time
+    """
+    if timestamp is None:
+        timestamp = unique_timestamp()
+    if index is not None:
+        timestamp = f"{timestamp}_{index:05d}"
     if prefix:
         return f"{prefix}_{timestamp}.{extension}"
     else:
@@ -212,6 +397,41 @@ def generate_timestamp_filename(prefix: str = "", extension: str = "mp3") -> str
 
 
 def ensure_audio_directory(directory: str = "audio") -> str:
-    """Ensure audio directory exists."""
-    Path(directory).mkdir(parents=True, exist_ok=True)
+    """
+    Ensure audio directory exists.
+
+    Directories are created once per process; later calls for the same
+    directory skip the filesystem.
+    """
+    with _ENSURED_LOCK:
+        if directory in _ENSURED_DIRS:
+            return directory
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(directory)
     return directory
+
+
+@lru_cache(maxsize=None)
+def get_temp_directory() -> Optional[str]:
+    """
+    Get directory for short-lived audio files (MP3 playback, pyttsx3 output).
+
+    Priority:
+    1. Environment variable TTS_CHUNK_TMPDIR
+    2. /dev/shm (tmpfs) if it exists
+    3. None - system default temp directory
+
+    Returns:
+        Directory path, or None to use tempfile's default
+    """
+    env_dir = os.environ.get("TTS_CHUNK_TMPDIR")
+    if env_dir:
+        return env_dir
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+    return None
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into non-empty sentences on terminator + whitespace."""
+    return [s for s in SENTENCE_REGEX.split(text.strip()) if s]
@@ -12,7 +12,11 @@ Usage:
 
 import sys
 import os
+import io
 import logging
+import shutil
+import wave
+from typing import IO, Optional, cast
 
 # Setup logging
 logging.basicConfig(level=logging.WARNING)
@@ -22,11 +26,83 @@ logger = logging.getLogger(__name__)
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "libs"))
 
 try:
-    from libs.api import play_audio
+    from libs.api import play_audio, play_audio_stream
+    from libs.formats import sniff, wav_header
 except ImportError as e:
     logger.error(f"Failed to import playback module: {e}")
     sys.exit(1)
 
+# Bytes read from stdin at a time
+CHUNK_SIZE = 65536
+
+
+def _wav_chunks(wf: wave.Wave_read):
+    """Yield (pcm, sample_rate) chunks of about CHUNK_SIZE bytes."""
+    frames_per_chunk = max(1, CHUNK_SIZE // (wf.getnchannels() * wf.getsampwidth()))
+    while True:
+        pcm = wf.readframes(frames_per_chunk)
+        if not pcm:
+            return
+        yield pcm, wf.getframerate()
+
+
+class _RecordingReader:
+    """Read from a stream, keeping a copy of the bytes until recorded is reset."""
+
+    def __init__(self, stream: IO[bytes]) -> None:
+        self.stream = stream
+        self.recorded: Optional[bytearray] = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        if self.recorded is not None:
+            self.recorded += data
+        return data
+
+
+class _PrefixedReader:
+    """Read bytes already taken from a stream, then the rest of the stream."""
+
+    def __init__(self, head: bytes, stream: IO[bytes]) -> None:
+        self.head = head
+        self.stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            data, self.head = self.head + self.stream.read(), b""
+            return data
+        data, self.head = self.head[:size], self.head[size:]
+        if len(data) < size:
+            data += self.stream.read(size - len(data))
+        return data
+
+
+def play_wav_stream(stream: IO[bytes]) -> None:
+    """
+    Play a WAV from a non-seekable stream as it arrives.
+
+    16-bit mono PCM starts playing with the first chunk; other PCM
+    layouts are read to the end and played as a whole. WAVs the wave
+    module cannot parse (e.g. float32, WAVE_FORMAT_EXTENSIBLE) are
+    handed to pygame unchanged.
+    """
+    reader = _RecordingReader(stream)
+    try:
+        wf = wave.open(cast(IO[bytes], reader), "rb")
+    except (wave.Error, EOFError):
+        header = bytes(cast(bytearray, reader.recorded))
+        play_audio(header + stream.read())
+        return
+    reader.recorded = None
+
+    with wf:
+        if wf.getnchannels() == 1 and wf.getsampwidth() == 2:
+            play_audio_stream(_wav_chunks(wf))
+            return
+        pcm = b"".join(pcm for pcm, _ in _wav_chunks(wf))
+        header = wav_header(wf.getnchannels(), wf.getsampwidth(), wf.getframerate(), len(pcm))
+    play_audio(header + pcm)
+
 
 def main():
     """Read audio from stdin and play it."""
@@ -41,25 +117,34 @@ def main():
             print("   or: cat audio.wav | python play.py", file=sys.stderr)
             return 1
 
-        # Read binary data from stdin
-        audio_data = sys.stdin.buffer.read()
+        # Read the 12 bytes sniff needs (read blocks until they arrive or
+        # EOF, peek may return fewer from a partly filled pipe)
+        stdin = sys.stdin.buffer
+        head = stdin.read(12)
 
-        if not audio_data:
+        if not head:
             print("Error: No audio data received", file=sys.stderr)
             return 1
 
         # Detect format
-        if audio_data.startswith(b"RIFF"):
-            format_type = "WAV"
-        elif audio_data.startswith(b"ID3") or audio_data[0:2] == b"\xff\xfb":
-            format_type = "MP3"
+        audio_format = sniff(head)
+        format_type = audio_format.upper() if audio_format else "Unknown"
+
+        if audio_format == "wav":
+            # WAV is played while it is still being received
+            print("Streaming WAV...", file=sys.stderr)
+            play_wav_stream(cast(IO[bytes], _PrefixedReader(head, stdin)))
         else:
-            format_type = "Unknown"
+            # Read binary data from stdin
+            buffer = io.BytesIO(head)
+            buffer.seek(0, io.SEEK_END)
+            shutil.copyfileobj(stdin, buffer, CHUNK_SIZE)
+            audio_data = buffer.getvalue()
 
-        print(f"Playing {len(audio_data)} bytes ({format_type})...", file=sys.stderr)
+            print(f"Playing {len(audio_data)} bytes ({format_type})...", file=sys.stderr)
 
-        # Play audio
-        play_audio(audio_data)
+            # Play audio
+            play_audio(audio_data)
 
         print("Playback completed", file=sys.stderr)
         return 0
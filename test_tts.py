@@ -16,26 +16,37 @@ License: MIT
 
 import unittest
 import tempfile
+import io
 import os
 import sys
+import wave
+from concurrent.futures import ProcessPoolExecutor
 from unittest.mock import patch
 import logging
-from typing import List, Any, Callable
-
-# Configure logging for tests
-logging.basicConfig(
-    handlers=[logging.StreamHandler(sys.stderr)],
-    level=logging.WARNING,
-    format="%(asctime)s.%(msecs)03d [%(levelname)s]: (%(name)s.%(funcName)s) - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+from typing import Dict, List, Any, Callable
+
+# Configure logging for tests: detailed with TTS_TEST_VERBOSE=1, plain
+# otherwise (set up first, so importing cli.py does not reconfigure it)
+if os.environ.get("TTS_TEST_VERBOSE"):
+    logging.basicConfig(
+        handlers=[logging.StreamHandler(sys.stderr)],
+        level=logging.WARNING,
+        format="%(asctime)s.%(msecs)03d [%(levelname)s]: (%(name)s.%(funcName)s) - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+else:
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
 try:
     from libs.api import (  # type: ignore
         text_to_speech_file,
         text_to_speech_bytes,
+        text_to_speech_bytes_batch,
         text_to_speech_bytesio,
+        text_to_speech_stream,
+        text_to_speech_bytes_parallel,
+        preload,
     )
     from libs.tools import (
         validate_text,
@@ -49,10 +60,13 @@ try:
         batch_tts,
         generate_timestamp_filename,
         ensure_audio_directory,
+        split_sentences,
     )
+    from libs import cache
+    from libs.formats import sniff
     from libs.exceptions import TTSException, ValidationError, EngineNotAvailableError
 except ImportError as e:
-    logger.error(f"Failed to import TTS library: {e}")
+    logger.error("Failed to import TTS library: %s", e)
     sys.exit(1)
 
 
@@ -118,6 +132,9 @@ def test_validate_text_too_long():
     """Test text length validation."""
     long_text = "a" * 5001
     assert_raises(ValidationError, validate_text, long_text)
+    # Padding counts against the pre-strip ceiling
+    assert_raises(ValidationError, validate_text, " " * 20000 + "a")
+    assert_equal(validate_text(" " * 1000 + "a"), "a", "Should strip padding")
 
 
 def test_validate_text_non_string():
@@ -163,8 +180,12 @@ def test_generate_timestamp_filename():
     filename = generate_timestamp_filename("", "mp3")
     assert_true(filename.endswith(".mp3"), "Filename should end with .mp3")
     assert_true(
-        len(filename) == 19, "Filename should be 19 characters long"
-    )  # YYYYMMDD_HHMMSS.mp3
+        len(filename) == 26, "Filename should be 26 characters long"
+    )  # YYYYMMDD_HHMMSS_xxxxxx.mp3
+    assert_true(
+        filename != generate_timestamp_filename("", "mp3"),
+        "Filenames in the same second should differ",
+    )
 
     filename_with_prefix = generate_timestamp_filename("test", "mp3")
     assert_true(
@@ -172,6 +193,11 @@ def test_generate_timestamp_filename():
     )
     assert_true(filename_with_prefix.endswith(".mp3"), "Filename should end with .mp3")
 
+    filename_with_index = generate_timestamp_filename("", "mp3", 7, "20240101_120000")
+    assert_equal(
+        filename_with_index, "20240101_120000_00007.mp3", "Filename should end with index"
+    )
+
 
 def test_ensure_audio_directory():
     """Test audio directory creation."""
@@ -182,6 +208,26 @@ def test_ensure_audio_directory():
         assert_true(os.path.exists(test_dir), "Directory should exist")
 
 
+def test_split_sentences():
+    """Test splitting text into sentences."""
+    result = split_sentences("Hello there. How are you?  Fine!\nVersion 3.5 is out")
+    assert_equal(
+        result,
+        ["Hello there.", "How are you?", "Fine!", "Version 3.5 is out"],
+        "Should split on terminators followed by whitespace",
+    )
+    assert_equal(split_sentences("   "), [], "Blank text has no sentences")
+
+
+def test_sniff_formats():
+    """Test audio format detection from header bytes."""
+    assert_equal(sniff(b"ID3\x04\x00"), "mp3", "ID3 tag is MP3")
+    assert_equal(sniff(b"\xff\xf3\x84\xc4"), "mp3", "MPEG sync word is MP3")
+    assert_equal(sniff(b"RIFF\x24\x00\x00\x00WAVEfmt "), "wav", "RIFF/WAVE is WAV")
+    assert_equal(sniff(b"OggS\x00\x02"), "ogg", "OggS is OGG")
+    assert_equal(sniff(b"abc"), None, "Unknown format is None")
+
+
 # Function composition tests
 def test_compose_functions():
     """Test function composition."""
@@ -206,6 +252,9 @@ def test_with_engine():
     offline_tts = with_engine("pyttsx3")(mock_tts_function)
     result = offline_tts("test")
     assert_equal(result, "pyttsx3", "Engine should be set correctly")
+    assert_equal(
+        offline_tts.__name__, "mock_tts_function", "Wrapper should keep the name"
+    )
 
 
 def test_with_language():
@@ -260,6 +309,95 @@ def test_text_to_speech_bytesio_success():
             assert_true(mock_generate.called, "generate should be called")
 
 
+def test_text_to_speech_bytes_batch_success():
+    """Test successful batch bytes generation keeps text order."""
+    with patch("engines.is_engine_available", return_value=True):
+        with patch("engines.gtts.generate") as mock_generate:
+            mock_generate.side_effect = lambda text, config: text.encode()
+
+            result = text_to_speech_bytes_batch(["One", "Two"], "gtts", "en")
+
+            assert_equal(result, [b"One", b"Two"], "Should return bytes in order")
+            assert_equal(mock_generate.call_count, 2, "generate should be called twice")
+
+
+def test_text_to_speech_bytes_batch_fallback():
+    """Test batch generation falls back to per-text generate."""
+    with patch("engines.is_engine_available", return_value=True):
+        with patch("libs.api.get_engine_batch_function", return_value=None):
+            with patch("engines.gtts.generate") as mock_generate:
+                mock_generate.side_effect = lambda text, config: text.encode()
+
+                result = text_to_speech_bytes_batch(["One", "Two"], "gtts", "en")
+
+                assert_equal(result, [b"One", b"Two"], "Should return bytes in order")
+                assert_equal(
+                    mock_generate.call_count, 2, "generate should be called per text"
+                )
+
+
+def fake_wav(text, config):
+    """Mock engine output: one 16-bit mono frame per character."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(22050)
+        wav_file.writeframes(b"\x01\x00" * len(text))
+    return buffer.getvalue()
+
+
+def test_text_to_speech_stream_sentences():
+    """Test streaming yields PCM per sentence for WAV engines."""
+    with patch("engines.is_engine_available", return_value=True):
+        with patch("engines.gtts.generate", side_effect=fake_wav):
+            result = list(text_to_speech_stream("One. Three.", "gtts", "en"))
+
+            assert_equal(
+                result,
+                [(b"\x01\x00" * 4, 22050), (b"\x01\x00" * 6, 22050)],
+                "Should yield (pcm, sample_rate) per sentence",
+            )
+
+
+def test_text_to_speech_bytes_parallel_joins_wav():
+    """Test parallel sentence synthesis joins WAV parts in order."""
+    with patch("engines.is_engine_available", return_value=True):
+        with patch("engines.gtts.generate", side_effect=fake_wav):
+            result = text_to_speech_bytes_parallel("One. Three. Five.", "gtts", "en", 2)
+
+            with wave.open(io.BytesIO(result), "rb") as wav_file:
+                assert_equal(wav_file.getnframes(), 15, "Should hold all frames")
+                assert_equal(wav_file.getframerate(), 22050, "Should keep rate")
+
+
+def test_preload_success():
+    """Test preload passes the language to the engine preload function."""
+    with patch("engines.is_engine_available", return_value=True):
+        with patch("engines.gtts.preload", create=True) as mock_preload:
+            preload("gtts", "en")
+
+            assert_true(mock_preload.called, "preload should be called")
+            config = mock_preload.call_args[0][0]
+            assert_equal(config["language"], "en", "Should pass language")
+
+
+def test_text_to_speech_bytes_cache():
+    """Test repeated text is served from the memory cache when enabled."""
+    with patch.dict(os.environ, {"TTS_CACHE_SIZE": "4"}):
+        with patch("engines.is_engine_available", return_value=True):
+            with patch("engines.gtts.generate") as mock_generate:
+                mock_generate.return_value = b"fake_audio_data"
+                cache.clear()
+
+                first = text_to_speech_bytes("Cached phrase", "gtts", "en")
+                second = text_to_speech_bytes("Cached phrase", "gtts", "en")
+                cache.clear()
+
+                assert_equal(second, first, "Should return cached bytes")
+                assert_equal(mock_generate.call_count, 1, "generate should run once")
+
+
 # Pipeline tests
 def test_create_tts_pipeline_file():
     """Test TTS pipeline file output."""
@@ -287,6 +425,12 @@ def test_create_tts_pipeline_bytes():
             assert_true(mock_generate.called, "generate should be called")
 
 
+def test_create_tts_pipeline_invalid_format():
+    """Test TTS pipeline rejects unknown output formats."""
+    pipeline = create_tts_pipeline("gtts", "en")
+    assert_raises(ValidationError, pipeline, "Hello world", "wav")
+
+
 # Batch processing tests
 def test_batch_tts_success():
     """Test successful batch processing."""
@@ -299,6 +443,7 @@ def test_batch_tts_success():
                 result = batch_tts(texts, output_dir=temp_dir, engine="gtts")
 
                 assert_equal(len(result), 3, "Should return 3 filenames")
+                assert_equal(len(set(result)), 3, "Filenames should be unique")
                 assert_true(
                     all(filename.endswith(".mp3") for filename in result),
                     "All filenames should end with .mp3",
@@ -308,6 +453,37 @@ def test_batch_tts_success():
                 )
 
 
+def test_batch_tts_disk_cache():
+    """Test batch processing copies texts found in the disk cache."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_dir = os.path.join(temp_dir, "cache")
+        with patch.dict(os.environ, {"TTS_CACHE_DIR": cache_dir}):
+            with patch("engines.is_engine_available", return_value=True):
+                with patch("engines.gtts.generate") as mock_generate:
+                    mock_generate.return_value = b"fake_audio_data"
+
+                    batch_tts(["Hello"], output_dir=os.path.join(temp_dir, "a"))
+                    result = batch_tts(["Hello"], output_dir=os.path.join(temp_dir, "b"))
+
+                    with open(result[0], "rb") as f:
+                        assert_equal(f.read(), b"fake_audio_data", "Should copy audio")
+                    assert_equal(mock_generate.call_count, 1, "generate should run once")
+
+
+def test_batch_tts_splits_long_text():
+    """Test batch processing splits long texts and joins their audio."""
+    sentence = "a" * 299 + "."
+    long_text = " ".join([sentence] * 3)
+    with patch("engines.is_engine_available", return_value=True):
+        with patch("engines.gtts.generate", side_effect=fake_wav) as mock_generate:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                result = batch_tts([long_text, "Short"], output_dir=temp_dir)
+
+                with wave.open(result[0], "rb") as wav_file:
+                    assert_equal(wav_file.getnframes(), 900, "Should join all chunks")
+                assert_equal(mock_generate.call_count, 4, "generate should run per chunk")
+
+
 def test_batch_tts_empty_list():
     """Test batch processing with empty list."""
     assert_raises(ValidationError, batch_tts, [])
@@ -318,6 +494,100 @@ def test_batch_tts_invalid_input():
     assert_raises(ValidationError, batch_tts, "not_a_list")
 
 
+# CLI tests
+class NonSeekableSink:
+    """Write-only sink, like a pipe on stdout."""
+
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += bytes(data)
+
+    def flush(self):
+        pass
+
+    def seekable(self):
+        return False
+
+
+def test_chunk_text():
+    """Test chunk_text packing, newline splits and oversized parts."""
+    from cli import chunk_text
+
+    # Fast path: fits in one chunk and has no newlines
+    assert_equal(chunk_text("  Hello world.  ", 50), ["Hello world."], "Should strip")
+    assert_equal(chunk_text("Hello. World.", 50), ["Hello. World."], "Should not split")
+    assert_equal(chunk_text("   ", 50), [], "Blank text has no chunks")
+
+    # Newlines split parts, which are packed back while they fit
+    assert_equal(
+        chunk_text("Line one\nLine two", 50), ["Line one Line two"], "Should pack"
+    )
+    assert_equal(
+        chunk_text("Line one\nLine two", 12), ["Line one", "Line two"], "Should split"
+    )
+
+    # Parts longer than max_len are hard split
+    assert_equal(
+        chunk_text("Short. " + "x" * 25 + ", tail.", 10),
+        ["Short.", "x" * 10, "x" * 10, "xxxxx,", "tail."],
+        "Should hard split oversized parts",
+    )
+    assert_equal(
+        chunk_text("One, two, three. Four!", 10),
+        ["One, two,", "three.", "Four!"],
+        "Should pack greedily",
+    )
+
+
+def test_wav_stream_writer_non_seekable():
+    """Test streamed WAV keeps unknown sizes when the sink cannot seek."""
+    from cli import WavStreamWriter
+
+    sink = NonSeekableSink()
+    writer = WavStreamWriter(sink)
+    writer.write(fake_wav("One", {}))
+    writer.write(fake_wav("Three", {}))
+    writer.close()
+
+    assert_equal(sink.data[4:8], b"\xff\xff\xff\xff", "RIFF size should be unknown")
+    assert_equal(sink.data[40:44], b"\xff\xff\xff\xff", "Data size should be unknown")
+    assert_equal(sink.data[44:], b"\x01\x00" * 8, "Should hold PCM of both chunks")
+
+
+def test_wav_stream_writer_seekable():
+    """Test streamed WAV sizes are patched on close for seekable streams."""
+    from cli import WavStreamWriter
+
+    out = io.BytesIO()
+    writer = WavStreamWriter(out)
+    writer.write(fake_wav("One", {}))
+    writer.write(fake_wav("Three", {}))
+    writer.close()
+
+    out.seek(0)
+    with wave.open(out, "rb") as wav_file:
+        assert_equal(wav_file.getnframes(), 8, "Should hold all frames")
+        assert_equal(wav_file.getframerate(), 22050, "Should keep rate")
+
+
+def test_wav_stream_writer_params_mismatch():
+    """Test streamed WAV rejects chunks with different parameters."""
+    from cli import WavStreamWriter
+
+    other = io.BytesIO()
+    with wave.open(other, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x01\x00")
+
+    writer = WavStreamWriter(io.BytesIO())
+    writer.write(fake_wav("One", {}))
+    assert_raises(TTSException, writer.write, other.getvalue())
+
+
 # Error handling tests
 def test_tts_exception():
     """Test TTS exception."""
@@ -358,9 +628,9 @@ def test_full_workflow_mock():
 
 
 # Test runner functions
-def run_validation_tests() -> List[bool]:
-    """Run all validation tests."""
-    tests = [
+# Test functions by category, in run order
+CATEGORY_TESTS: Dict[str, List[Callable[[], None]]] = {
+    "Validation Tests": [
         test_validate_text_valid,
         test_validate_text_empty,
         test_validate_text_whitespace,
@@ -371,138 +641,76 @@ def run_validation_tests() -> List[bool]:
         test_validate_language_valid,
         test_validate_language_invalid,
         test_get_default_config,
-    ]
-
-    results = []
-    for test in tests:
-        try:
-            test()
-            results.append(True)
-        except Exception as e:
-            print(f"Test {test.__name__} failed: {e}")
-            results.append(False)
-
-    return results
-
-
-def run_utility_tests() -> List[bool]:
-    """Run all utility tests."""
-    tests = [test_generate_timestamp_filename, test_ensure_audio_directory]
-
-    results = []
-    for test in tests:
-        try:
-            test()
-            results.append(True)
-        except Exception as e:
-            print(f"Test {test.__name__} failed: {e}")
-            results.append(False)
-
-    return results
-
-
-def run_composition_tests() -> List[bool]:
-    """Run all function composition tests."""
-    tests = [test_compose_functions, test_with_engine, test_with_language]
-
-    results = []
-    for test in tests:
-        try:
-            test()
-            results.append(True)
-        except Exception as e:
-            print(f"Test {test.__name__} failed: {e}")
-            results.append(False)
-
-    return results
-
-
-def run_tts_tests() -> List[bool]:
-    """Run all TTS function tests."""
-    tests = [
+    ],
+    "Utility Tests": [
+        test_generate_timestamp_filename,
+        test_ensure_audio_directory,
+        test_split_sentences,
+        test_sniff_formats,
+    ],
+    "Composition Tests": [
+        test_compose_functions,
+        test_with_engine,
+        test_with_language,
+    ],
+    "TTS Function Tests": [
         test_text_to_speech_file_success,
         test_text_to_speech_bytes_success,
         test_text_to_speech_bytesio_success,
-    ]
-
-    results = []
-    for test in tests:
-        try:
-            test()
-            results.append(True)
-        except Exception as e:
-            print(f"Test {test.__name__} failed: {e}")
-            results.append(False)
-
-    return results
-
-
-def run_pipeline_tests() -> List[bool]:
-    """Run all pipeline tests."""
-    tests = [test_create_tts_pipeline_file, test_create_tts_pipeline_bytes]
-
-    results = []
-    for test in tests:
-        try:
-            test()
-            results.append(True)
-        except Exception as e:
-            print(f"Test {test.__name__} failed: {e}")
-            results.append(False)
-
-    return results
-
-
-def run_batch_tests() -> List[bool]:
-    """Run all batch processing tests."""
-    tests = [
+        test_text_to_speech_bytes_batch_success,
+        test_text_to_speech_bytes_batch_fallback,
+        test_text_to_speech_stream_sentences,
+        test_text_to_speech_bytes_parallel_joins_wav,
+        test_preload_success,
+        test_text_to_speech_bytes_cache,
+    ],
+    "Pipeline Tests": [
+        test_create_tts_pipeline_file,
+        test_create_tts_pipeline_bytes,
+        test_create_tts_pipeline_invalid_format,
+    ],
+    "Batch Tests": [
         test_batch_tts_success,
+        test_batch_tts_disk_cache,
+        test_batch_tts_splits_long_text,
         test_batch_tts_empty_list,
         test_batch_tts_invalid_input,
-    ]
-
-    results = []
-    for test in tests:
-        try:
-            test()
-            results.append(True)
-        except Exception as e:
-            print(f"Test {test.__name__} failed: {e}")
-            results.append(False)
-
-    return results
-
-
-def run_error_tests() -> List[bool]:
-    """Run all error handling tests."""
-    tests = [test_tts_exception, test_validation_error, test_engine_not_available_error]
-
-    results = []
-    for test in tests:
-        try:
-            test()
-            results.append(True)
-        except Exception as e:
-            print(f"Test {test.__name__} failed: {e}")
-            results.append(False)
-
-    return results
+    ],
+    "CLI Tests": [
+        test_chunk_text,
+        test_wav_stream_writer_non_seekable,
+        test_wav_stream_writer_seekable,
+        test_wav_stream_writer_params_mismatch,
+    ],
+    "Error Handling Tests": [
+        test_tts_exception,
+        test_validation_error,
+        test_engine_not_available_error,
+    ],
+    "Integration Tests": [
+        test_full_workflow_mock,
+    ],
+}
+
+
+def _ok(test: Callable[[], None]) -> bool:
+    """Run one test and report whether it passed."""
+    try:
+        test()
+        return True
+    except Exception as e:
+        logger.error("Test %s failed: %s", test.__name__, e)
+        return False
 
 
-def run_integration_tests() -> List[bool]:
-    """Run all integration tests."""
-    tests = [test_full_workflow_mock]
+def run_tests(tests: List[Callable[[], None]]) -> List[bool]:
+    """Run tests in order and return their pass/fail results."""
+    return [_ok(test) for test in tests]
 
-    results = []
-    for test in tests:
-        try:
-            test()
-            results.append(True)
-        except Exception as e:
-            print(f"Test {test.__name__} failed: {e}")
-            results.append(False)
 
-    return results
+def run_category(category_name: str) -> List[bool]:
+    """Run the tests of one category (in a worker process)."""
+    return run_tests(CATEGORY_TESTS[category_name])
 
 
 def run_all_tests() -> bool:
@@ -510,26 +718,24 @@ def run_all_tests() -> bool:
     print("TTS Library Functional Test Suite")
     print("=" * 50)
 
-    test_categories = [
-        ("Validation Tests", run_validation_tests),
-        ("Utility Tests", run_utility_tests),
-        ("Composition Tests", run_composition_tests),
-        ("TTS Function Tests", run_tts_tests),
-        ("Pipeline Tests", run_pipeline_tests),
-        ("Batch Tests", run_batch_tests),
-        ("Error Handling Tests", run_error_tests),
-        ("Integration Tests", run_integration_tests),
-    ]
-
     all_results = []
 
-    for category_name, test_runner in test_categories:
-        print(f"\nRunning {category_name}...")
-        results = test_runner()
-        passed = sum(results)
-        total = len(results)
-        print(f"  Passed: {passed}/{total}")
-        all_results.extend(results)
+    # Categories run concurrently, one process each, so the module globals
+    # and os.environ they patch are never shared; results are reported in
+    # order
+    max_workers = min(len(CATEGORY_TESTS), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        futures = [
+            (category_name, ex.submit(run_category, category_name))
+            for category_name in CATEGORY_TESTS
+        ]
+        for category_name, future in futures:
+            print(f"\nRunning {category_name}...")
+            results = future.result()
+            passed = sum(results)
+            total = len(results)
+            print(f"  Passed: {passed}/{total}")
+            all_results.extend(results)
 
     total_passed = sum(all_results)
     total_tests = len(all_results)